@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import DemoSession
 
-# Register your models here.
+
+@admin.register(DemoSession)
+class DemoSessionAdmin(admin.ModelAdmin):
+    list_display = ('institution_name', 'session_id', 'created_at', 'expires_at')
+    search_fields = ('institution_name', 'session_id')
+    readonly_fields = ('session_id', 'created_at')
@@ -0,0 +1,146 @@
+"""
+Bounded conversation memory for the chatbot
+
+Each ChatSession keeps its last few turns verbatim plus a compact rolling
+summary of everything older. The summary is folded forward in a
+background thread after each turn, so prompt size stays bounded however
+long a session runs. History is rebuilt from the database on every turn,
+so any worker process can serve the next message of a session.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+
+from chatbot.models import ChatSession
+from .llm_limits import BACKGROUND
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a sales conversation between a visitor "
+    "and JN Assistant for JavaNet EdTech Suite. Keep facts about the visitor "
+    "(institution, country, size, modules of interest, contact details) and "
+    "open questions. Reply with the updated summary only."
+)
+
+
+class ConversationMemory:
+    """Rolling summary plus the last N turns for each chat session"""
+
+    def __init__(self, ai_service, recent_turns=None, max_summary_chars=None, max_turn_chars=500):
+        self.ai_service = ai_service
+        self.recent_turns = recent_turns or getattr(settings, 'AI_HISTORY_RECENT_TURNS', 3)
+        self.max_summary_chars = max_summary_chars or getattr(settings, 'AI_HISTORY_SUMMARY_MAX_CHARS', 1200)
+        self.max_turn_chars = max_turn_chars
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='chat-summary')
+        self._pending = set()
+        # Sessions that got another turn while their fold was running
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def history_for(self, session):
+        """Return chat messages (role/content dicts) to prepend to the prompt"""
+        # The summary may have been folded since this session row was loaded
+        summary = ChatSession.objects.filter(pk=session.pk).values_list('summary', flat=True).first()
+        return self._build_history(summary, self._recent_messages(session))
+
+    def _recent_messages(self, session):
+        # Skip the visitor message stored for the current turn
+        window = self.recent_turns * 2
+        messages = list(session.messages.order_by('-timestamp')[:window + 1])
+        if messages and messages[0].message_type == 'USER':
+            messages = messages[1:]
+        return list(reversed(messages[:window]))
+
+    def _build_history(self, summary, messages):
+        history = []
+        if summary:
+            history.append({'role': 'system', 'content': f"Conversation so far: {summary}"})
+        for msg in messages:
+            if msg.message_type == 'SYSTEM':
+                continue
+            history.append({
+                'role': 'user' if msg.message_type == 'USER' else 'assistant',
+                'content': msg.content[:self.max_turn_chars],
+            })
+        return history
+
+    def schedule_update(self, session):
+        """Fold older turns into the summary in the background
+
+        A fold already running for the session is run again once it
+        finishes, so the newest turn is always summarized.
+        """
+        with self._lock:
+            running = session.pk in self._pending
+            if running:
+                self._dirty.add(session.pk)
+            else:
+                self._pending.add(session.pk)
+        if not running:
+            self._executor.submit(self._update, session.pk)
+
+    def _update(self, session_pk):
+        close_old_connections()
+        try:
+            while True:
+                try:
+                    self._fold(session_pk)
+                except Exception as e:
+                    print(f"Conversation summary error: {e}")
+                with self._lock:
+                    if session_pk not in self._dirty:
+                        self._pending.discard(session_pk)
+                        return
+                    self._dirty.discard(session_pk)
+        finally:
+            close_old_connections()
+
+    def _fold(self, session_pk):
+        session = ChatSession.objects.get(pk=session_pk)
+        messages = list(session.messages.order_by('timestamp'))
+        # A visitor message without a reply belongs to a turn still in progress
+        while messages and messages[-1].message_type == 'USER':
+            messages.pop()
+        window = self.recent_turns * 2
+        older = messages[:-window] if len(messages) > window else []
+
+        if len(older) > session.summarized_message_count:
+            new_messages = older[session.summarized_message_count:]
+            ChatSession.objects.filter(pk=session_pk).update(
+                summary=self.summarize(session.summary, new_messages),
+                summarized_message_count=len(older),
+            )
+
+    def summarize(self, summary, new_messages):
+        """Fold new messages into the summary, via the LLM when available"""
+        lines = "\n".join(
+            f"{'Visitor' if msg.message_type == 'USER' else 'Assistant'}: {msg.content[:self.max_turn_chars]}"
+            for msg in new_messages if msg.message_type != 'SYSTEM'
+        )
+        request = (
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            f"New messages:\n{lines}\n\n"
+            f"Return the updated summary in under {self.max_summary_chars // 6} words."
+        )
+
+        updated = self.ai_service.chat_with_openai(
+            [
+                {'role': 'system', 'content': SUMMARY_SYSTEM_PROMPT},
+                {'role': 'user', 'content': request},
+            ],
+            max_tokens=300, temperature=0.2, priority=BACKGROUND,
+        )
+        if not updated:
+            updated = self.ai_service.chat_with_cohere(
+                f"{SUMMARY_SYSTEM_PROMPT}\n\n{request}\nSummary:",
+                max_tokens=300, temperature=0.2, priority=BACKGROUND,
+            )
+        if not updated:
+            # Extractive fallback: keep what the visitor said, newest last
+            visitor_lines = [
+                msg.content[:200] for msg in new_messages if msg.message_type == 'USER'
+            ]
+            updated = " | ".join(filter(None, [summary] + visitor_lines))
+
+        # Keep the newest part when the summary outgrows its budget
+        return updated[-self.max_summary_chars:]
@@ -0,0 +1,206 @@
+"""
+Expiring store for platform demo sessions
+
+Sessions live in a per-process dict of slotted entries. Expiry is tracked
+with a timing wheel: each entry is filed under the tick in which it
+expires, and advancing the wheel drops whole buckets, so every entry is
+reclaimed exactly once (O(1) amortized) without scanning the store.
+At DEMO_SESSION_MAX_ENTRIES the sessions closest to expiry are evicted
+early, so a flood of demo requests cannot grow the store without bound.
+An optional database tier lets any worker fetch a demo minted by another.
+"""
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+
+
+def _to_datetime(timestamp):
+    """Epoch seconds to a datetime matching the USE_TZ setting"""
+    value = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+    return value if settings.USE_TZ else timezone.make_naive(value)
+
+
+def _to_timestamp(value):
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.timestamp()
+
+
+class DemoEntry:
+    __slots__ = (
+        'session_id', 'institution_name', 'primary_color', 'secondary_color',
+        'accent_color', 'ctb', 'live_classes', 'created_at', 'expires_at',
+    )
+
+    def __init__(self, session_id, institution_name, primary_color, secondary_color,
+                 accent_color, ctb, live_classes, created_at, expires_at):
+        self.session_id = session_id
+        self.institution_name = institution_name
+        self.primary_color = primary_color
+        self.secondary_color = secondary_color
+        self.accent_color = accent_color
+        self.ctb = ctb
+        self.live_classes = live_classes
+        self.created_at = created_at  # epoch seconds
+        self.expires_at = expires_at
+
+    def to_dict(self):
+        return {
+            'session_id': self.session_id,
+            'institution_name': self.institution_name,
+            'branding': {
+                'primary_color': self.primary_color,
+                'secondary_color': self.secondary_color,
+                'accent_color': self.accent_color,
+            },
+            'modules': {
+                'ctb': self.ctb,
+                'live_classes': self.live_classes,
+            },
+            'created_at': _to_datetime(self.created_at).isoformat(),
+            'expires_at': _to_datetime(self.expires_at).isoformat(),
+        }
+
+
+class DemoSessionStore:
+    """In-process TTL store with a timing wheel and an optional DB tier"""
+
+    def __init__(self, ttl_seconds=None, tick_seconds=60, max_entries=None, use_db=None):
+        self.ttl_seconds = ttl_seconds or getattr(settings, 'DEMO_SESSION_TTL_SECONDS', 24 * 3600)
+        self.tick_seconds = tick_seconds
+        self.max_entries = max_entries or getattr(settings, 'DEMO_SESSION_MAX_ENTRIES', 10000)
+        self.use_db = use_db if use_db is not None else getattr(settings, 'DEMO_SESSION_DB_TIER', True)
+
+        # One bucket per tick across the TTL, plus one for the current tick
+        self._wheel = [deque() for _ in range(math.ceil(self.ttl_seconds / tick_seconds) + 1)]
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._tick = int(time.time() // tick_seconds)
+        self._next_db_purge = 0.0
+        self._expired = 0
+        self._evicted = 0
+
+    def _advance(self, now):
+        """Drop every bucket whose tick has fully passed"""
+        current = int(now // self.tick_seconds)
+        # Never sweep more than one full turn, however long we were idle
+        for tick in range(max(self._tick, current - len(self._wheel) + 1), current):
+            bucket = self._wheel[tick % len(self._wheel)]
+            for session_id in bucket:
+                entry = self._entries.get(session_id)
+                if entry is not None and entry.expires_at <= now:
+                    del self._entries[session_id]
+                    self._expired += 1
+            bucket.clear()
+        self._tick = max(self._tick, current)
+
+    def _evict(self, count):
+        """Drop count live entries, those expiring soonest first"""
+        for offset in range(len(self._wheel)):
+            bucket = self._wheel[(self._tick + offset) % len(self._wheel)]
+            while bucket and count > 0:
+                # Ids in a bucket are in insertion order, so oldest first
+                if self._entries.pop(bucket.popleft(), None) is not None:
+                    self._evicted += 1
+                    count -= 1
+            if count <= 0:
+                return
+
+    def _insert(self, entry, now):
+        if len(self._entries) >= self.max_entries:
+            # Full: make room by dropping the sessions closest to expiry
+            self._advance(now)
+            self._evict(len(self._entries) - self.max_entries + 1)
+        self._entries[entry.session_id] = entry
+        tick = int(entry.expires_at // self.tick_seconds)
+        self._wheel[tick % len(self._wheel)].append(entry.session_id)
+
+    def create(self, institution_name, primary_color, secondary_color, accent_color,
+               ctb=True, live_classes=False):
+        now = time.time()
+        entry = DemoEntry(
+            str(uuid.uuid4()), institution_name, primary_color, secondary_color,
+            accent_color, bool(ctb), bool(live_classes), now, now + self.ttl_seconds,
+        )
+        with self._lock:
+            self._advance(now)
+            self._insert(entry, now)
+        if self.use_db:
+            self._save_to_db(entry, now)
+        return entry
+
+    def get(self, session_id):
+        """Return the live entry for session_id, or None"""
+        now = time.time()
+        session_id = str(session_id)
+        with self._lock:
+            self._advance(now)
+            entry = self._entries.get(session_id)
+        if entry is not None and entry.expires_at > now:
+            return entry
+        if entry is None and self.use_db:
+            entry = self._load_from_db(session_id, now)
+            if entry is not None:
+                with self._lock:
+                    self._insert(entry, now)
+                return entry
+        return None
+
+    def _save_to_db(self, entry, now):
+        from .models import DemoSession
+        try:
+            DemoSession.objects.create(
+                session_id=entry.session_id,
+                institution_name=entry.institution_name[:200],
+                branding=entry.to_dict()['branding'],
+                modules={'ctb': entry.ctb, 'live_classes': entry.live_classes},
+                created_at=_to_datetime(entry.created_at),
+                expires_at=_to_datetime(entry.expires_at),
+            )
+            if now >= self._next_db_purge:
+                self._next_db_purge = now + getattr(settings, 'DEMO_SESSION_DB_PURGE_SECONDS', 3600)
+                DemoSession.objects.filter(
+                    expires_at__lte=_to_datetime(now)
+                ).delete()
+        except Exception as e:
+            print(f"Demo session save error: {e}")
+
+    def _load_from_db(self, session_id, now):
+        from .models import DemoSession
+        try:
+            row = DemoSession.objects.filter(
+                session_id=session_id,
+                expires_at__gt=_to_datetime(now),
+            ).first()
+        except Exception as e:
+            # Malformed ids and database outages both read as a miss
+            print(f"Demo session load error: {e}")
+            return None
+        if row is None:
+            return None
+        branding, modules = row.branding or {}, row.modules or {}
+        return DemoEntry(
+            str(row.session_id), row.institution_name,
+            branding.get('primary_color'), branding.get('secondary_color'), branding.get('accent_color'),
+            modules.get('ctb', True), modules.get('live_classes', False),
+            _to_timestamp(row.created_at), _to_timestamp(row.expires_at),
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'expired': self._expired,
+                'evicted': self._evicted,
+                'wheel_buckets': len(self._wheel),
+                'db_tier': self.use_db,
+            }
+
+
+# Create singleton instance
+demo_sessions = DemoSessionStore()
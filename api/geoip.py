@@ -0,0 +1,218 @@
+"""
+Offline IP-to-country lookup
+
+Country ranges live in a compact binary file (built from a CSV by the
+update_geoip management command) and are held in memory as sorted integer
+arrays: 32-bit for IPv4, and the upper 64 bits for IPv6 since providers
+allocate at /64 or coarser. A lookup is one binary search; results are
+memoized per /24 (IPv4) or /64 (IPv6) prefix in a bounded LRU.
+"""
+import ipaddress
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from django.conf import settings
+
+MAGIC = b'JNGEO1'
+HEADER = struct.Struct('<6sIII')  # magic, country count, IPv4 ranges, IPv6 ranges
+
+# Returned by the prefix cache when a /24 or /64 spans several ranges
+SPLIT = object()
+
+
+def parse_ip(value):
+    """Return an ipaddress object, or None for junk and non-public addresses"""
+    try:
+        ip = ipaddress.ip_address(value.strip())
+    except (AttributeError, ValueError):
+        return None
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    if not ip.is_global:
+        return None
+    return ip
+
+
+def build_tables(rows, skipped=None):
+    """Compile (start, end, country_code) rows into sorted, merged range arrays
+
+    Returns (codes, v4, v6) where v4 and v6 are (starts, ends, country index)
+    array triples ready to be written by save_tables. Rows whose addresses
+    do not parse (such as a header row) are left out and, if skipped is a
+    list, appended to it.
+    """
+    codes = []
+    code_index = {}
+    ranges = {4: [], 6: []}
+    for row in rows:
+        start, end, code = row
+        try:
+            start, end = ipaddress.ip_address(start.strip()), ipaddress.ip_address(end.strip())
+        except ValueError:
+            if skipped is not None:
+                skipped.append(row)
+            continue
+        code = code.strip().upper()
+        if start.version != end.version or not code or code == 'ZZ':
+            continue
+        if code not in code_index:
+            code_index[code] = len(codes)
+            codes.append(code)
+        if start.version == 4:
+            ranges[4].append((int(start), int(end), code_index[code]))
+        else:
+            ranges[6].append((int(start) >> 64, int(end) >> 64, code_index[code]))
+
+    tables = {}
+    for version, typecode in ((4, 'I'), (6, 'Q')):
+        starts, ends, countries = array(typecode), array(typecode), array('H')
+        for start, end, country in sorted(ranges[version]):
+            if starts and countries[-1] == country and start <= ends[-1] + 1:
+                # Merge adjacent or overlapping ranges for the same country
+                ends[-1] = max(ends[-1], end)
+                continue
+            if starts and start <= ends[-1]:
+                # Overlap with another country: the earlier range wins
+                start = ends[-1] + 1
+                if start > end:
+                    continue
+            starts.append(start)
+            ends.append(end)
+            countries.append(country)
+        tables[version] = (starts, ends, countries)
+    return codes, tables[4], tables[6]
+
+
+def save_tables(path, codes, v4, v6):
+    """Write the range arrays to path atomically"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(codes), len(v4[0]), len(v6[0])))
+        f.write(''.join(codes).encode('ascii'))
+        for table in (v4, v6):
+            for values in table:
+                values.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def load_tables(path):
+    """Read the range arrays written by save_tables"""
+    with open(path, 'rb') as f:
+        magic, code_count, v4_count, v6_count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a GeoIP range file")
+        raw_codes = f.read(code_count * 2).decode('ascii')
+        codes = [raw_codes[i:i + 2] for i in range(0, len(raw_codes), 2)]
+        tables = []
+        for count, typecode in ((v4_count, 'I'), (v6_count, 'Q')):
+            table = []
+            for column_type in (typecode, typecode, 'H'):
+                values = array(column_type)
+                values.fromfile(f, count)
+                table.append(values)
+            tables.append(tuple(table))
+    return codes, tables[0], tables[1]
+
+
+class GeoIPDatabase:
+    """In-memory IP range table, reloaded when the file on disk changes"""
+
+    def __init__(self, path=None, cache_size=65536, check_seconds=60):
+        self.path = str(path or getattr(settings, 'GEOIP_DATABASE_PATH', ''))
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._codes = []
+        self._v4 = self._v6 = (array('I'), array('I'), array('H'))
+        self._mtime = None
+        self._checked_at = None
+        self._missing_logged = False
+        self._lookups = 0
+        self._prefix = lru_cache(maxsize=cache_size)(self._lookup_prefix)
+
+    def _maybe_load(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                if not self._missing_logged:
+                    print(f"GeoIP database not found at {self.path}; using header heuristics")
+                    self._missing_logged = True
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                self._codes, self._v4, self._v6 = load_tables(self.path)
+            except Exception as e:
+                print(f"GeoIP load error: {e}")
+                return
+            self._mtime = mtime
+            self._prefix.cache_clear()
+
+    @staticmethod
+    def _find(table, value):
+        starts, ends, countries = table
+        i = bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            return i
+        return None
+
+    def _lookup_prefix(self, version, prefix):
+        """Country index for a whole /24 or /64, or SPLIT if it is not uniform"""
+        if version == 4:
+            table, low, high = self._v4, prefix << 8, (prefix << 8) | 0xFF
+        else:
+            table, low, high = self._v6, prefix, prefix
+        i = self._find(table, low)
+        if i is None:
+            return SPLIT if self._find(table, high) is not None else None
+        if high <= table[1][i]:
+            return table[2][i]
+        return SPLIT
+
+    def country_code(self, ip):
+        """ISO 3166 alpha-2 code for an address string, or None if unknown"""
+        ip = parse_ip(ip) if isinstance(ip, str) else ip
+        if ip is None:
+            return None
+        self._maybe_load()
+        if not self._codes:
+            return None
+
+        self._lookups += 1
+        value = int(ip)
+        if ip.version == 4:
+            country = self._prefix(4, value >> 8)
+            if country is SPLIT:
+                i = self._find(self._v4, value)
+                country = None if i is None else self._v4[2][i]
+        else:
+            country = self._prefix(6, value >> 64)
+            if country is SPLIT:
+                country = None
+        return None if country is None else self._codes[country]
+
+    def stats(self):
+        cache_info = self._prefix.cache_info()
+        return {
+            'loaded': bool(self._codes),
+            'ipv4_ranges': len(self._v4[0]),
+            'ipv6_ranges': len(self._v6[0]),
+            'lookups': self._lookups,
+            'prefix_cache_hits': cache_info.hits,
+            'prefix_cache_size': cache_info.currsize,
+        }
+
+
+# Create singleton instance
+geoip = GeoIPDatabase()
@@ -0,0 +1,120 @@
+"""
+Per-provider concurrency limits for LLM calls
+
+Each provider gets a fixed number of concurrent slots. Callers that find
+every slot busy wait in a priority queue: interactive chat is served
+before background jobs such as summarization. A caller that waits longer
+than its priority's queue budget gets ProviderBusy and falls back.
+"""
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+class ProviderBusy(Exception):
+    """Raised when no provider slot frees up within the queue budget"""
+
+
+class ProviderLimiter:
+    """Bounded concurrency with a priority wait queue"""
+
+    def __init__(self, name, max_concurrent, queue_seconds):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.queue_seconds = queue_seconds  # priority -> max seconds in queue
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiters = []  # heap of [priority, seq, granted]
+        self._seq = itertools.count()
+
+        self._acquired = 0
+        self._queued = 0
+        self._rejected = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """Take a slot, waiting in priority order up to the queue budget"""
+        if timeout is None:
+            timeout = self.queue_seconds.get(priority, self.queue_seconds[INTERACTIVE])
+        started = time.monotonic()
+
+        with self._cond:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                self._acquired += 1
+                return
+
+            entry = [priority, next(self._seq), False]
+            heapq.heappush(self._waiters, entry)
+            self._queued += 1
+            deadline = started + timeout
+            while not entry[2]:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._rejected += 1
+                    raise ProviderBusy(f"{self.name}: no slot free after {timeout:.1f}s in queue")
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - started
+            self._acquired += 1
+            self._waited += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def release(self):
+        """Hand the slot to the highest-priority waiter, or free it"""
+        with self._cond:
+            if self._waiters:
+                # The slot passes straight to the waiter, so _active is unchanged
+                heapq.heappop(self._waiters)[2] = True
+                self._cond.notify_all()
+            else:
+                self._active -= 1
+
+    @contextmanager
+    def slot(self, priority=INTERACTIVE, timeout=None):
+        self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        """Queue depth and wait time metrics"""
+        with self._cond:
+            return {
+                'active': self._active,
+                'max_concurrent': self.max_concurrent,
+                'queue_depth': len(self._waiters),
+                'acquired': self._acquired,
+                'queued': self._queued,
+                'rejected': self._rejected,
+                'avg_wait_seconds': round(self._wait_total / self._waited, 3) if self._waited else 0.0,
+                'max_wait_seconds': round(self._wait_max, 3),
+            }
+
+
+def _build_limiters():
+    queue_seconds = {
+        INTERACTIVE: getattr(settings, 'AI_PROVIDER_QUEUE_SECONDS', 5),
+        BACKGROUND: getattr(settings, 'AI_PROVIDER_BACKGROUND_QUEUE_SECONDS', 30),
+    }
+    return {
+        'openai': ProviderLimiter('openai', getattr(settings, 'AI_OPENAI_MAX_CONCURRENCY', 4), queue_seconds),
+        'cohere': ProviderLimiter('cohere', getattr(settings, 'AI_COHERE_MAX_CONCURRENCY', 4), queue_seconds),
+    }
+
+
+# Create singleton instances
+provider_limits = _build_limiters()
@@ -0,0 +1,75 @@
+"""
+Adaptive load shedding for outbound LLM calls
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from django.conf import settings
+
+
+class LatencyGovernor:
+    """Tracks in-flight LLM calls and recent latency to decide when to degrade"""
+
+    def __init__(self, slo_seconds=None, max_in_flight=None, window_seconds=None, max_samples=200):
+        self.slo_seconds = slo_seconds if slo_seconds is not None else getattr(settings, 'AI_LATENCY_SLO_SECONDS', 6.0)
+        self.max_in_flight = max_in_flight if max_in_flight is not None else getattr(settings, 'AI_MAX_IN_FLIGHT', 8)
+        self.window_seconds = window_seconds if window_seconds is not None else getattr(settings, 'AI_LATENCY_WINDOW_SECONDS', 60)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._samples = deque(maxlen=max_samples)  # (finished_at, latency)
+        self._decisions = 0
+        self._degraded = 0
+
+    @contextmanager
+    def track(self):
+        """Count an outbound call as in flight and record its latency"""
+        started = time.monotonic()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._in_flight -= 1
+                self._samples.append((finished, finished - started))
+
+    def _recent_p90(self, now):
+        """90th percentile latency of calls finished inside the window"""
+        cutoff = now - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        if not self._samples:
+            return 0.0
+        latencies = sorted(latency for _, latency in self._samples)
+        return latencies[int(len(latencies) * 0.9) - 1 if len(latencies) >= 10 else -1]
+
+    def should_shed(self):
+        """Return True when another LLM call would likely breach the SLO"""
+        with self._lock:
+            self._decisions += 1
+            shed = (
+                self._in_flight >= self.max_in_flight
+                or self._recent_p90(time.monotonic()) > self.slo_seconds
+            )
+            if shed:
+                self._degraded += 1
+            return shed
+
+    def stats(self):
+        """Snapshot of governor state for health checks and dashboards"""
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'max_in_flight': self.max_in_flight,
+                'slo_seconds': self.slo_seconds,
+                'recent_p90_seconds': round(self._recent_p90(time.monotonic()), 3),
+                'decisions': self._decisions,
+                'degraded': self._degraded,
+            }
+
+
+# Create singleton instance
+llm_governor = LatencyGovernor()
@@ -0,0 +1,38 @@
+import csv
+import gzip
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.geoip import build_tables, save_tables
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the offline IP-to-country table from a start,end,country CSV (e.g. DB-IP Lite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='CSV (optionally .gz) with start IP, end IP and country code columns')
+        parser.add_argument('--output', default=str(getattr(settings, 'GEOIP_DATABASE_PATH', '')),
+                            help='Where to write the binary range table')
+
+    def handle(self, *args, **options):
+        opener = gzip.open if options['csv_path'].endswith('.gz') else open
+        skipped = []
+        try:
+            with opener(options['csv_path'], 'rt', newline='', encoding='utf-8') as f:
+                rows = (row[:3] for row in csv.reader(f) if len(row) >= 3 and not row[0].startswith('#'))
+                codes, v4, v6 = build_tables(rows, skipped)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['csv_path']}: {e}")
+
+        if skipped:
+            # Usually just the header row
+            self.stderr.write(self.style.WARNING(
+                f"Skipped {len(skipped)} row(s) without valid IP addresses, e.g. {','.join(skipped[0])}"
+            ))
+        if not codes:
+            raise CommandError(f"No valid IP ranges found in {options['csv_path']}")
+
+        save_tables(options['output'], codes, v4, v6)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(v4[0])} IPv4 and {len(v6[0])} IPv6 ranges for {len(codes)} countries to {options['output']}"
+        ))
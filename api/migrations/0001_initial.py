@@ -0,0 +1,26 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:37
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemoSession',
+            fields=[
+                ('session_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('institution_name', models.CharField(max_length=200)),
+                ('branding', models.JSONField(default=dict)),
+                ('modules', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,14 @@
 from django.db import models
+import uuid
 
-# Create your models here.
+class DemoSession(models.Model):
+    """Durable tier of the demo session store, shared by all workers"""
+    session_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    institution_name = models.CharField(max_length=200)
+    branding = models.JSONField(default=dict)
+    modules = models.JSONField(default=dict)
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"Demo for {self.institution_name} ({str(self.session_id)[:8]})"
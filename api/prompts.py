@@ -0,0 +1,127 @@
+"""
+Precompiled system prompts for JN Assistant
+
+The prompt is laid out static-first so providers can reuse their prompt
+cache: a byte-identical prefix shared by every request, then a short
+per-locale block (memoized per country/currency), then the retrieved
+knowledge for the current message.
+"""
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+STATIC_PREFIX = """You are JN Assistant for JavaNet EdTech Suite.
+Company: JavaNet ICT Solutions Ltd
+Website: www.javanetict.com
+Live Demo: ischool.ng
+
+Pricing:
+- One-time deployment fee (no monthly subscriptions)
+- African countries: ₦5-10 million
+- International: $10,000 USD
+
+Always be helpful, professional, and encourage users to:
+1. Try the live demo at ischool.ng
+2. Use the platform simulator
+3. Generate a custom proposal
+4. Contact for consultation
+"""
+
+DEFAULT_KNOWLEDGE = """Products:
+1. ctb Testing System - Computer-based testing with automated grading
+2. Live Classroom Platform - Interactive virtual classrooms
+
+Key Features:
+- White-label/custom branding
+- Custom proposal generator
+- Platform demo simulator"""
+
+RenderedPrompt = namedtuple('RenderedPrompt', ['text', 'scope', 'prefix_tokens', 'tokens'])
+
+
+def count_tokens(text):
+    """Token count with tiktoken when available, else a 4-chars-per-token estimate"""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return max(1, len(text) // 4)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        print(f"tiktoken unavailable, estimating prompt tokens: {e}")
+        return None
+
+
+class SystemPromptBuilder:
+    """Memoizes the rendered system prompt per (country, currency)"""
+
+    def __init__(self, fee_calculator):
+        self.fee_calculator = fee_calculator
+        self.prefix_tokens = count_tokens(STATIC_PREFIX)
+        self.default_knowledge_tokens = count_tokens(DEFAULT_KNOWLEDGE)
+        self._lock = threading.Lock()
+        self._locales = {}  # (country, currency, fee) -> (text, tokens)
+        self._builds = 0
+
+    def _locale(self, country, currency):
+        # The fee is part of the key so a price change renders a new prompt
+        deployment_fee = self.fee_calculator(country)
+        key = (country, currency, deployment_fee['amount'])
+        locale = self._locales.get(key)
+        if locale is None:
+            currency_symbol = '₦' if currency == 'NGN' else '$'
+            text = (
+                f"{STATIC_PREFIX}\n"
+                f"Location: {country}\n"
+                f"Currency: {currency} ({currency_symbol})\n"
+                f"Deployment Fee: {deployment_fee['amount']} one-time fee\n"
+            )
+            locale = (text, count_tokens(text))
+            with self._lock:
+                self._locales[key] = locale
+        return locale
+
+    def build(self, country, currency, snippets=None):
+        """Render the system prompt; the locale part is a dict lookup"""
+        scope, scope_tokens = self._locale(country, currency)
+        if snippets:
+            knowledge = "Relevant information:\n" + "\n".join(f"- {snippet[:400]}" for snippet in snippets)
+            knowledge_tokens = count_tokens(knowledge)
+        else:
+            knowledge = DEFAULT_KNOWLEDGE
+            knowledge_tokens = self.default_knowledge_tokens
+        with self._lock:
+            self._builds += 1
+        return RenderedPrompt(
+            text=f"{scope}\n{knowledge}",
+            scope=scope,
+            prefix_tokens=self.prefix_tokens,
+            tokens=scope_tokens + knowledge_tokens,
+        )
+
+    def clear(self):
+        """Forget memoized locale prompts"""
+        with self._lock:
+            self._locales.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'builds': self._builds,
+                'prefix_tokens': self.prefix_tokens,
+                'locales': {
+                    f"{country}/{currency}": tokens
+                    for (country, currency, _), (_, tokens) in self._locales.items()
+                },
+            }
@@ -0,0 +1,192 @@
+"""
+Response cache for AI chat answers
+
+Two tiers: a bounded in-process LRU with TTL, and an optional shared tier
+backed by one of Django's configured caches (AI_RESPONSE_CACHE_ALIAS) so
+answers are reused across workers.
+
+clear() bumps a generation counter that every worker polls to drop its
+local entries. The counter lives in the shared tier, or in the default
+cache when there is none. It only reaches other workers if that cache is
+shared between processes; with Django's default per-process LocMemCache,
+clear() empties the calling worker only and the others keep their
+answers until AI_RESPONSE_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+GENERATION_KEY = 'ai-response-cache:generation'
+
+
+def normalize_message(message):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = _PUNCTUATION.sub(' ', (message or '').lower())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def make_cache_key(message, context=None):
+    """Key on the normalized message plus a hash of the context string"""
+    context_hash = hashlib.sha256((context or '').encode('utf-8')).hexdigest()[:16]
+    return f"{context_hash}:{normalize_message(message)}"
+
+
+class ResponseCache:
+    """Bounded LRU with TTL in front of the paid AI providers"""
+
+    def __init__(self, max_entries=None, ttl_seconds=None, shared_alias=None, generation_check_seconds=5):
+        self.max_entries = max_entries or getattr(settings, 'AI_RESPONSE_CACHE_MAX_ENTRIES', 512)
+        self.ttl_seconds = ttl_seconds or getattr(settings, 'AI_RESPONSE_CACHE_TTL_SECONDS', 3600)
+        self.shared_alias = shared_alias or getattr(settings, 'AI_RESPONSE_CACHE_ALIAS', None)
+        self.generation_check_seconds = generation_check_seconds
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._generation = 0
+        self._generation_checked_at = 0.0
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+
+    # ------------------------------------------------------------------
+    # Shared tier helpers
+    # ------------------------------------------------------------------
+
+    def _shared(self):
+        if not self.shared_alias:
+            return None
+        try:
+            return caches[self.shared_alias]
+        except Exception as e:
+            print(f"Response cache: shared tier unavailable: {e}")
+            return None
+
+    def _generation_cache(self):
+        """Cache holding the invalidation counter: the shared tier, else the default cache"""
+        shared = self._shared()
+        if shared is not None:
+            return shared
+        try:
+            return caches['default']
+        except Exception as e:
+            print(f"Response cache: default cache unavailable: {e}")
+            return None
+
+    def _shared_key(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return f"ai-response:{self._generation}:{digest}"
+
+    def _sync_generation(self):
+        """Drop local entries when another worker invalidated the shared tier"""
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.generation_check_seconds:
+            return
+        self._generation_checked_at = now
+        generation_cache = self._generation_cache()
+        if generation_cache is None:
+            return
+        try:
+            generation = generation_cache.get(GENERATION_KEY, 0)
+        except Exception as e:
+            print(f"Response cache: could not read generation: {e}")
+            return
+        if generation != self._generation:
+            with self._lock:
+                self._entries.clear()
+                self._generation = generation
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key):
+        """Return a cached response or None"""
+        self._sync_generation()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                response = shared.get(self._shared_key(key))
+            except Exception as e:
+                print(f"Response cache: shared get failed: {e}")
+                response = None
+            if response is not None:
+                self._store_local(key, response)
+                with self._lock:
+                    self._shared_hits += 1
+                return response
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def set(self, key, response):
+        """Store a response in both tiers"""
+        self._store_local(key, response)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(self._shared_key(key), response, self.ttl_seconds)
+            except Exception as e:
+                print(f"Response cache: shared set failed: {e}")
+
+    def _store_local(self, key, response):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Invalidate every cached response, locally and in the shared tier"""
+        with self._lock:
+            self._entries.clear()
+        generation_cache = self._generation_cache()
+        if generation_cache is None:
+            return
+        try:
+            try:
+                generation = generation_cache.incr(GENERATION_KEY)
+            except ValueError:
+                generation_cache.add(GENERATION_KEY, 1, None)
+                generation = generation_cache.get(GENERATION_KEY, 1)
+        except Exception as e:
+            print(f"Response cache: could not bump generation: {e}")
+            return
+        with self._lock:
+            self._generation = generation
+            self._generation_checked_at = time.monotonic()
+
+    def stats(self):
+        """Hit/miss counters for health checks and dashboards"""
+        with self._lock:
+            lookups = self._hits + self._shared_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'shared_hits': self._shared_hits,
+                'misses': self._misses,
+                'hit_rate': round((self._hits + self._shared_hits) / lookups, 3) if lookups else 0.0,
+                'shared_tier': bool(self.shared_alias),
+            }
+
+
+# Create singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,274 @@
+"""
+In-memory BM25 index over Feature, Intent and ChatbotConfig content
+
+Used by the chatbot to answer high-confidence questions locally and to
+inject only the most relevant snippets into LLM prompts. The periodic full
+rebuild runs in a background thread into a fresh index that is swapped in
+when done, so queries keep using the current one meanwhile.
+"""
+import math
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import close_old_connections
+
+from .response_cache import normalize_message
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it me my
+of on or our please the this to we what when where which who why with you your
+""".split())
+
+
+def tokenize(text):
+    """Normalize, drop stopwords and fold simple plurals"""
+    tokens = []
+    for token in normalize_message(text).split():
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _as_text(value):
+    """Flatten JSON content (strings, lists, dicts) into plain text"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return ' '.join(_as_text(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_as_text(v) for v in value)
+    return '' if value is None else str(value)
+
+
+def _first_response(value):
+    """Pick the text to answer with from a JSON response value"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return _first_response(value[0]) if value else ''
+    if isinstance(value, dict):
+        for key in ('response', 'responses', 'text', 'answer'):
+            if key in value:
+                return _first_response(value[key])
+    return _as_text(value)
+
+
+class KnowledgeIndex:
+    """BM25 index kept in sync with the database through model signals"""
+
+    def __init__(self, k1=1.5, b=0.75, min_score=None, min_coverage=None, rebuild_seconds=None):
+        self.k1 = k1
+        self.b = b
+        self.min_score = min_score or getattr(settings, 'AI_RETRIEVAL_MIN_SCORE', 2.5)
+        self.min_coverage = min_coverage or getattr(settings, 'AI_RETRIEVAL_MIN_COVERAGE', 0.75)
+        self.rebuild_seconds = rebuild_seconds or getattr(settings, 'AI_RETRIEVAL_REBUILD_SECONDS', 300)
+
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._docs = {}      # doc_id -> (answer, length, term counts)
+        self._postings = {}  # term -> {doc_id: term frequency}
+        self._total_length = 0
+        self._built_at = None
+        # Incremental changes made while a rebuild runs, replayed onto its result
+        self._journal = None
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def upsert(self, doc_id, text, answer):
+        """Add or replace a single document"""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(lambda index: index.upsert(doc_id, text, answer))
+            self._remove(doc_id)
+            if not terms or not answer:
+                return
+            length = sum(terms.values())
+            self._docs[doc_id] = (answer, length, terms)
+            self._total_length += length
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(lambda index: index.remove(doc_id))
+            self._remove(doc_id)
+
+    def remove_prefix(self, prefix):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(lambda index: index.remove_prefix(prefix))
+            for doc_id in [d for d in self._docs if d.startswith(prefix)]:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc[1]
+        for term in doc[2]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def index_feature(self, feature):
+        self.upsert(
+            f"feature:{feature.pk}",
+            f"{feature.name} {feature.name} {feature.description}",
+            f"{feature.name}: {feature.description}",
+        )
+
+    def index_intent(self, intent, prefix='intent'):
+        """Index an Intent model instance or an intent dict from ChatbotConfig"""
+        if isinstance(intent, dict):
+            key, patterns, responses = intent.get('tag'), intent.get('patterns'), intent.get('responses')
+        else:
+            key, patterns, responses = intent.pk, intent.patterns, intent.responses
+        self.upsert(
+            f"{prefix}:{key}",
+            f"{_as_text(patterns)} {_as_text(responses)}",
+            _first_response(responses),
+        )
+
+    def index_config(self, config):
+        """Index the intents and industry responses of a ChatbotConfig"""
+        prefix = f"config:{config.pk}:"
+        with self._lock:
+            self.remove_prefix(prefix)
+            if not config.is_active:
+                return
+            for intent in config.intents or []:
+                if isinstance(intent, dict):
+                    self.index_intent(intent, prefix=f"{prefix}intent")
+            for industry, response in (config.industry_responses or {}).items():
+                self.upsert(
+                    f"{prefix}industry:{industry}",
+                    f"{industry} {_as_text(response)}",
+                    _first_response(response),
+                )
+
+    def rebuild(self):
+        """Rebuild the whole index from the database and swap it in
+
+        The index lock is only held for the swap; signal updates that land
+        while the database is read are replayed onto the new index.
+        """
+        with self._build_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        from core.models import Feature
+        from chatbot.models import Intent, ChatbotConfig
+
+        with self._lock:
+            self._journal = []
+        fresh = KnowledgeIndex(self.k1, self.b, self.min_score, self.min_coverage, self.rebuild_seconds)
+        try:
+            for feature in Feature.objects.all():
+                fresh.index_feature(feature)
+            for intent in Intent.objects.all():
+                fresh.index_intent(intent)
+            for config in ChatbotConfig.objects.filter(is_active=True):
+                fresh.index_config(config)
+        except Exception as e:
+            print(f"Knowledge index rebuild error: {e}")
+            with self._lock:
+                self._journal = None
+                # Retry at the next interval rather than on every query
+                self._built_at = time.monotonic()
+            return
+
+        with self._lock:
+            for change in self._journal:
+                change(fresh)
+            self._journal = None
+            self._docs = fresh._docs
+            self._postings = fresh._postings
+            self._total_length = fresh._total_length
+            self._built_at = time.monotonic()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            close_old_connections()
+
+    def _ensure_built(self):
+        """Build on first use; later rebuilds run off the request path"""
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self._rebuild()
+            return
+        with self._lock:
+            if time.monotonic() - self._built_at <= self.rebuild_seconds:
+                return
+            # Push the deadline forward so only one query starts the rebuild
+            self._built_at = time.monotonic()
+        threading.Thread(target=self._rebuild_in_background, name='knowledge-index', daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _score(self, query_terms):
+        scores = {}
+        matched = {}
+        doc_count = len(self._docs)
+        avg_length = self._total_length / doc_count
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self._docs[doc_id][1]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+        return scores, matched
+
+    def search(self, query, k=3):
+        """Return up to k (score, coverage, answer) tuples, best first"""
+        query_terms = tokenize(query)
+        if not query_terms:
+            return []
+        self._ensure_built()
+        with self._lock:
+            if not self._docs:
+                return []
+            scores, matched = self._score(query_terms)
+            unique_terms = len(set(query_terms))
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [
+                (score, matched[doc_id] / unique_terms, self._docs[doc_id][0])
+                for doc_id, score in ranked
+            ]
+
+    def answer(self, query):
+        """Return a local answer when the best match is confident enough"""
+        results = self.search(query, k=1)
+        if not results:
+            return None
+        score, coverage, answer = results[0]
+        if score >= self.min_score and coverage >= self.min_coverage:
+            return answer
+        return None
+
+    def snippets(self, query, k=None):
+        """Top-k answer texts to ground an LLM prompt"""
+        k = k or getattr(settings, 'AI_RETRIEVAL_TOP_K', 3)
+        return [answer for _, _, answer in self.search(query, k=k)]
+
+
+# Create singleton instance
+knowledge_index = KnowledgeIndex()
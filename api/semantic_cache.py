@@ -0,0 +1,387 @@
+"""
+Embedding-based semantic cache for AI answers
+
+Past questions are embedded into rows of one contiguous float32 matrix so a
+lookup is a single vectorized cosine-similarity pass. Answers are only
+reused for the same context (country/currency), above a similarity
+threshold, and only when the specifics that change an answer (numbers,
+emails, names and negations) are exactly the same: embeddings barely
+separate "500 students" from "5000 students" or "with" from "without".
+Requires NumPy; without it the cache is disabled.
+
+clear() bumps a generation counter, kept like the response cache's in
+AI_RESPONSE_CACHE_ALIAS or the default cache, that every worker polls to
+drop its matrix; the saved file records its generation and is ignored
+once it is stale. As with the response cache, this only reaches other
+workers when that cache is shared between processes.
+"""
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+from .llm_limits import provider_limits, ProviderBusy, INTERACTIVE
+from .response_cache import normalize_message
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_WORD = re.compile(r"[A-Za-z][A-Za-z'’]*")
+_SENTENCE_END = re.compile(r"[.!?]\s*$")
+
+GENERATION_KEY = 'ai-semantic-cache:generation'
+
+NEGATIONS = frozenset([
+    'no', 'not', 'none', 'nor', 'never', 'without', 'except', 'excluding', 'cannot', 'neither',
+])
+
+
+def _context_id(context):
+    """Stable 63-bit id for a context string"""
+    digest = hashlib.sha256((context or '').encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') >> 1
+
+
+def specifics(message):
+    """Tokens that must match exactly for two questions to share an answer
+
+    Emails, numbers, negations, and capitalized words other than the first
+    of a sentence (names of people, schools and places).
+    """
+    text = message or ''
+    tokens = {email.lower() for email in _EMAIL.findall(text)}
+    text = _EMAIL.sub(' ', text)
+    tokens.update(number.replace(',', '') for number in _NUMBER.findall(text))
+    for match in _WORD.finditer(text):
+        word = match.group()
+        lowered = word.lower()
+        if lowered in NEGATIONS or lowered.endswith(("n't", "n’t")):
+            tokens.add('not')
+        elif word[0].isupper() and word != 'I':
+            before = text[:match.start()]
+            if before.strip() and not _SENTENCE_END.search(before):
+                tokens.add(word)
+    return sorted(tokens)
+
+
+class HashingEmbedder:
+    """Deterministic local embedder using hashed words and character trigrams"""
+    name = 'hashing'
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _features(self, text):
+        words = normalize_message(text).split()
+        for word in words:
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], 0.5
+        for first, second in zip(words, words[1:]):
+            yield f"{first} {second}", 0.75
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+            vector[h % self.dim] += weight if h & (1 << 63) else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API, within the OpenAI provider limit"""
+    name = 'openai'
+
+    def __init__(self, model='text-embedding-3-small', dim=1536):
+        self.model = model
+        self.dim = dim
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                import openai
+                self._client = openai.OpenAI(api_key=getattr(settings, 'OPENAI_API_KEY', None))
+            return self._client
+
+    def embed(self, text):
+        try:
+            with provider_limits['openai'].slot(INTERACTIVE):
+                response = self.client().embeddings.create(model=self.model, input=text)
+            vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        except ProviderBusy as e:
+            print(f"OpenAI embedding skipped: {e}")
+            return None
+        except Exception as e:
+            print(f"OpenAI embedding error: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+
+class SemanticCache:
+    """Capacity-bounded nearest-neighbour cache of question/answer pairs"""
+
+    def __init__(self, embedder=None, capacity=None, threshold=None, path=None, save_every=25,
+                 generation_check_seconds=5):
+        self.enabled = np is not None and getattr(settings, 'AI_SEMANTIC_CACHE_ENABLED', True)
+        self.capacity = capacity or getattr(settings, 'AI_SEMANTIC_CACHE_CAPACITY', 2048)
+        self.threshold = threshold if threshold is not None else getattr(settings, 'AI_SEMANTIC_CACHE_THRESHOLD', 0.9)
+        self.path = path if path is not None else getattr(settings, 'AI_SEMANTIC_CACHE_PATH', None)
+        self.save_every = save_every
+        self.generation_check_seconds = generation_check_seconds
+
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._generation_checked_at = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._unsaved = 0
+
+        if not self.enabled:
+            return
+
+        if embedder is None:
+            embedder = OpenAIEmbedder() if getattr(settings, 'AI_SEMANTIC_CACHE_EMBEDDER', 'hashing') == 'openai' else HashingEmbedder()
+        self.embedder = embedder
+
+        self._matrix = np.zeros((self.capacity, embedder.dim), dtype=np.float32)
+        self._context_ids = np.zeros(self.capacity, dtype=np.int64)
+        self._specific_ids = np.zeros(self.capacity, dtype=np.int64)
+        self._last_used = np.zeros(self.capacity, dtype=np.float64)
+        self._valid = np.zeros(self.capacity, dtype=bool)
+        self._questions = [None] * self.capacity
+        self._answers = [None] * self.capacity
+
+        if self.path:
+            self._generation = self._read_generation()
+            self.load()
+            atexit.register(self.save)
+
+    # ------------------------------------------------------------------
+    # Cross-worker invalidation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _generation_cache():
+        """Cache holding the invalidation counter, as for the response cache"""
+        try:
+            return caches[getattr(settings, 'AI_RESPONSE_CACHE_ALIAS', None) or 'default']
+        except Exception as e:
+            print(f"Semantic cache: generation cache unavailable: {e}")
+            return None
+
+    def _read_generation(self):
+        generation_cache = self._generation_cache()
+        if generation_cache is None:
+            return self._generation
+        try:
+            return generation_cache.get(GENERATION_KEY, 0)
+        except Exception as e:
+            print(f"Semantic cache: could not read generation: {e}")
+            return self._generation
+
+    def _sync_generation(self):
+        """Drop every entry when another worker cleared the cache"""
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.generation_check_seconds:
+            return
+        self._generation_checked_at = now
+        generation = self._read_generation()
+        if generation != self._generation:
+            with self._lock:
+                self._forget()
+                self._generation = generation
+                self._unsaved = 0
+
+    def _forget(self):
+        self._valid[:] = False
+        self._questions = [None] * self.capacity
+        self._answers = [None] * self.capacity
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def embed(self, message):
+        """Embedding of message for lookup() and add(), or None"""
+        if not self.enabled:
+            return None
+        return self.embedder.embed(message)
+
+    def lookup(self, message, context=None, vector=None):
+        """Return the cached answer for the nearest past question, or None
+
+        Pass vector from embed() to reuse it for a later add().
+        """
+        if not self.enabled:
+            return None
+        self._sync_generation()
+        if vector is None:
+            vector = self.embedder.embed(message)
+        if vector is None:
+            return None
+        context_id = _context_id(context)
+        specific_id = _context_id("\n".join(specifics(message)))
+
+        with self._lock:
+            scores = self._matrix @ vector
+            same_scope = (self._context_ids == context_id) & (self._specific_ids == specific_id)
+            scores[~(self._valid & same_scope)] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self._last_used[best] = time.time()
+                self._hits += 1
+                return self._answers[best]
+            self._misses += 1
+            return None
+
+    def add(self, message, context, answer, vector=None):
+        """Store an answer, evicting the least recently used entry when full"""
+        if not self.enabled:
+            return
+        self._sync_generation()
+        if vector is None:
+            vector = self.embedder.embed(message)
+        if vector is None:
+            return
+
+        with self._lock:
+            free = np.flatnonzero(~self._valid)
+            slot = int(free[0]) if free.size else int(np.argmin(self._last_used))
+            self._matrix[slot] = vector
+            self._context_ids[slot] = _context_id(context)
+            self._specific_ids[slot] = _context_id("\n".join(specifics(message)))
+            self._last_used[slot] = time.time()
+            self._valid[slot] = True
+            self._questions[slot] = message
+            self._answers[slot] = answer
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+
+    def clear(self):
+        """Forget every cached answer, in every worker and on disk"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._forget()
+            self._unsaved = 0
+        generation_cache = self._generation_cache()
+        if generation_cache is not None:
+            try:
+                try:
+                    generation = generation_cache.incr(GENERATION_KEY)
+                except ValueError:
+                    generation_cache.add(GENERATION_KEY, 1, None)
+                    generation = generation_cache.get(GENERATION_KEY, 1)
+                with self._lock:
+                    self._generation = generation
+                    self._generation_checked_at = time.monotonic()
+            except Exception as e:
+                print(f"Semantic cache: could not bump generation: {e}")
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Semantic cache: could not remove {self.path}: {e}")
+
+    def save(self):
+        """Persist the cache to disk for warm restarts"""
+        if not (self.enabled and self.path):
+            return
+        # A worker that missed a clear() must not write its stale entries back
+        self._generation_checked_at = 0.0
+        self._sync_generation()
+        with self._lock:
+            if not self._unsaved:
+                return
+            texts = json.dumps({'questions': self._questions, 'answers': self._answers})
+            payload = {
+                'embedder': np.array(self.embedder.name),
+                'generation': np.array(self._generation),
+                'matrix': self._matrix.copy(),
+                'context_ids': self._context_ids.copy(),
+                'specific_ids': self._specific_ids.copy(),
+                'last_used': self._last_used.copy(),
+                'valid': self._valid.copy(),
+                'texts': np.array(texts),
+            }
+            self._unsaved = 0
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **payload)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Semantic cache: could not save to {self.path}: {e}")
+
+    def load(self):
+        """Load a previously saved cache if it matches this embedder"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                if str(data['embedder']) != self.embedder.name or data['matrix'].shape[1] != self.embedder.dim:
+                    print(f"Semantic cache: ignoring {self.path}, embedder changed")
+                    return
+                if 'specific_ids' not in data.files:
+                    print(f"Semantic cache: ignoring {self.path}, saved before specifics were matched")
+                    return
+                if 'generation' not in data.files or int(data['generation']) != self._generation:
+                    print(f"Semantic cache: ignoring {self.path}, cleared since it was saved")
+                    return
+                texts = json.loads(str(data['texts']))
+                count = min(self.capacity, data['matrix'].shape[0])
+                # Keep the most recently used entries when capacity shrank
+                order = np.argsort(-data['last_used'])[:count]
+                with self._lock:
+                    self._matrix[:count] = data['matrix'][order]
+                    self._context_ids[:count] = data['context_ids'][order]
+                    self._specific_ids[:count] = data['specific_ids'][order]
+                    self._last_used[:count] = data['last_used'][order]
+                    self._valid[:count] = data['valid'][order]
+                    self._questions[:count] = [texts['questions'][i] for i in order]
+                    self._answers[:count] = [texts['answers'][i] for i in order]
+        except Exception as e:
+            print(f"Semantic cache: could not load {self.path}: {e}")
+
+    def stats(self):
+        """Hit/miss counters for health checks and dashboards"""
+        if not self.enabled:
+            return {'enabled': False}
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': True,
+                'embedder': self.embedder.name,
+                'entries': int(self._valid.sum()),
+                'capacity': self.capacity,
+                'threshold': self.threshold,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Create singleton instance
+semantic_cache = SemanticCache()
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from core.models import Feature, Testimonial, Client
 from chatbot.models import ChatSession, ChatMessage
 from proposals.models import ProposalRequest
+from proposals.pricing import pricing_engine
 
 class FeatureSerializer(serializers.ModelSerializer):
     class Meta:
@@ -36,11 +37,7 @@ class ProposalRequestSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         # Auto-detect currency based on country
-        country = validated_data.get('country', '').lower()
-        if 'nigeria' in country or any(african_country in country for african_country in ['ghana', 'kenya', 'south africa']):
-            validated_data['currency'] = 'NGN'
-        else:
-            validated_data['currency'] = 'USD'
+        validated_data['currency'] = pricing_engine.currency_for(validated_data.get('country', ''))
         
         return super().create(validated_data)
 
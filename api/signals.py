@@ -0,0 +1,49 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Feature
+from chatbot.models import ChatbotConfig, Intent
+from .response_cache import response_cache
+from .semantic_cache import semantic_cache
+from .retrieval import knowledge_index
+
+
+@receiver([post_save, post_delete], sender=ChatbotConfig)
+@receiver([post_save, post_delete], sender=Feature)
+@receiver([post_save, post_delete], sender=Intent)
+def invalidate_response_cache(sender, **kwargs):
+    """Cached AI answers depend on the chatbot configuration and the knowledge base"""
+    response_cache.clear()
+    semantic_cache.clear()
+
+
+# Keep the knowledge index in sync incrementally
+
+@receiver(post_save, sender=Feature)
+def index_feature(sender, instance, **kwargs):
+    knowledge_index.index_feature(instance)
+
+
+@receiver(post_delete, sender=Feature)
+def unindex_feature(sender, instance, **kwargs):
+    knowledge_index.remove(f"feature:{instance.pk}")
+
+
+@receiver(post_save, sender=Intent)
+def index_intent(sender, instance, **kwargs):
+    knowledge_index.index_intent(instance)
+
+
+@receiver(post_delete, sender=Intent)
+def unindex_intent(sender, instance, **kwargs):
+    knowledge_index.remove(f"intent:{instance.pk}")
+
+
+@receiver(post_save, sender=ChatbotConfig)
+def index_config(sender, instance, **kwargs):
+    knowledge_index.index_config(instance)
+
+
+@receiver(post_delete, sender=ChatbotConfig)
+def unindex_config(sender, instance, **kwargs):
+    knowledge_index.remove_prefix(f"config:{instance.pk}:")
@@ -0,0 +1,70 @@
+"""
+Single-flight coalescing of identical concurrent calls
+
+Concurrent callers that ask for the same key share one execution of the
+underlying function. The first caller runs it; everyone else waits for
+its result. Errors raised by the call are re-raised in every waiter.
+"""
+import threading
+
+
+class CoalescedCallTimeout(TimeoutError):
+    """Raised in a waiter when the shared call does not finish in time"""
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key, fn, timeout=None):
+        """Call fn(), or wait for the in-flight call with the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+            else:
+                call.waiters += 1
+                self._coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+            return call.result
+
+        if not call.event.wait(timeout):
+            raise CoalescedCallTimeout(f"Shared call for {key!r} did not finish within {timeout}s")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self._executed,
+                'coalesced': self._coalesced,
+            }
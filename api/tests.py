@@ -1,3 +1,109 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from openai.types.chat import ChatCompletionChunk
 
-# Create your tests here.
+from .semantic_cache import HashingEmbedder, SemanticCache, specifics
+from .views import AIService
+
+
+class SemanticCacheSpecificsTests(SimpleTestCase):
+    """Questions that differ in a detail must never share a cached answer
+
+    The threshold is low enough that every pair would match on similarity alone.
+    """
+
+    CONTEXT = 'NG:NGN'
+
+    def cache_with(self, question):
+        cache = SemanticCache(embedder=HashingEmbedder(), capacity=8, threshold=0.8, path='')
+        cache.add(question, self.CONTEXT, 'cached answer')
+        return cache
+
+    def assertNotShared(self, first, second):
+        self.assertIsNone(self.cache_with(first).lookup(second, self.CONTEXT))
+
+    def test_student_counts(self):
+        self.assertNotShared(
+            "How much for a school in Lagos with 500 students and live classes?",
+            "How much for a school in Lagos with 5000 students and live classes?",
+        )
+
+    def test_negation(self):
+        self.assertNotShared(
+            "What is the price with live classes and CBT?",
+            "What is the price without live classes and CBT?",
+        )
+
+    def test_names(self):
+        self.assertNotShared(
+            "My name is John and I run Greenfield Academy, what would it cost?",
+            "My name is Mary and I run Greenfield Academy, what would it cost?",
+        )
+
+    def test_emails(self):
+        self.assertNotShared(
+            "Please send the proposal to john@example.com",
+            "Please send the proposal to mary@example.com",
+        )
+
+    def test_paraphrase_is_shared(self):
+        cache = self.cache_with("How much does the CBT platform cost?")
+        self.assertEqual(cache.lookup("how much does the CBT platform cost", self.CONTEXT), 'cached answer')
+
+    def test_explicit_zero_threshold(self):
+        self.assertEqual(SemanticCache(embedder=HashingEmbedder(), capacity=8, threshold=0.0, path='').threshold, 0.0)
+
+    def test_lookup_vector_is_reused_by_add(self):
+        embedder = HashingEmbedder()
+        calls = []
+        embed = embedder.embed
+        embedder.embed = lambda text: calls.append(text) or embed(text)
+        cache = SemanticCache(embedder=embedder, capacity=8, threshold=0.8, path='')
+        vector = cache.embed("Do you offer live classes?")
+        self.assertIsNone(cache.lookup("Do you offer live classes?", self.CONTEXT, vector))
+        cache.add("Do you offer live classes?", self.CONTEXT, 'cached answer', vector)
+        self.assertEqual(len(calls), 1)
+
+    def test_clear_reaches_other_instances(self):
+        # Both instances poll the same generation counter in the default cache
+        first, second = (
+            SemanticCache(embedder=HashingEmbedder(), capacity=8, threshold=0.8, path='', generation_check_seconds=0)
+            for _ in range(2)
+        )
+        second.add("How much does the CBT platform cost?", self.CONTEXT, 'cached answer')
+        first.clear()
+        self.assertIsNone(second.lookup("How much does the CBT platform cost?", self.CONTEXT))
+
+    def test_specifics(self):
+        self.assertEqual(
+            specifics("Send it to A@B.com. We have 1,200 students, not Lagos"),
+            ['1200', 'Lagos', 'a@b.com', 'not'],
+        )
+
+
+class OpenAIStreamTests(SimpleTestCase):
+    """stream_with_openai against the openai>=1.0 client interface"""
+
+    @staticmethod
+    def chunk(content=None, choices=True):
+        return ChatCompletionChunk.model_validate({
+            'id': 'chatcmpl-1', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'gpt-3.5-turbo',
+            'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': None}] if choices else [],
+        })
+
+    def service(self, chunks):
+        service = AIService()
+        service.openai_available = True
+        create = lambda **kwargs: iter(chunks)
+        service.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        return service
+
+    def test_yields_deltas(self):
+        chunks = [self.chunk(''), self.chunk('Hello'), self.chunk(' there'), self.chunk(choices=False)]
+        deltas = list(self.service(chunks).stream_with_openai([{'role': 'user', 'content': 'hi'}]))
+        self.assertEqual(deltas, ['Hello', ' there'])
+
+    def test_empty_stream_raises(self):
+        stream = self.service([self.chunk(''), self.chunk(choices=False)]).stream_with_openai([])
+        with self.assertRaises(RuntimeError):
+            list(stream)
@@ -15,12 +15,15 @@ urlpatterns = [
     
     # AI Chatbot
     path('chat/send/', views.ChatBotView.as_view(), name='chat-send'),
+    path('chat/stream/', views.ChatBotStreamView.as_view(), name='chat-stream'),
     
     # Proposal Generator (One-time fee)
     path('proposals/generate/', views.ProposalGeneratorView.as_view(), name='generate-proposal'),
     
     # Platform Demo Simulator
     path('demo/platform/', views.PlatformDemoView.as_view(), name='platform-demo'),
+    path('demo/platform/<uuid:session_id>/', views.PlatformDemoDetailView.as_view(), name='platform-demo-detail'),
+    path('themes/<slug:name>.<str:kind>', views.ThemeAssetView.as_view(), name='theme-asset'),
     
     # Currency & Localization with Deployment Fee
     path('currency/detect/', views.CurrencyDetectView.as_view(), name='detect-currency'),
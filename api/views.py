@@ -5,9 +5,13 @@ from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
-from django.http import FileResponse, HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.core.files.base import ContentFile
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+import hashlib
 import json
+import threading
 import uuid
 import os
 from datetime import datetime, timedelta
@@ -27,10 +31,27 @@ import cohere
 
 # Import models
 from core.models import Feature, Testimonial, Client
+from core.themes import theme_assets
 from chatbot.models import ChatSession, ChatMessage
 from proposals.models import ProposalRequest
 from users.models import CustomUser, UserActivity
 
+from .load_shedding import llm_governor
+from .response_cache import response_cache, make_cache_key
+from .semantic_cache import semantic_cache
+from .retrieval import knowledge_index
+from .singleflight import SingleFlight, CoalescedCallTimeout
+from .prompts import SystemPromptBuilder
+from .llm_limits import provider_limits, INTERACTIVE
+from .conversation import ConversationMemory
+from .geoip import geoip
+from .demo_sessions import demo_sessions
+from proposals.pricing import pricing_engine
+from proposals.pdf_cache import pdf_cache
+from proposals.jobs import render_queue
+from proposals.idempotency import idempotent, idempotency_store
+from proposals.dedup import proposal_fingerprint, reuse_recent
+
 # Import serializers
 from .serializers import (
     FeatureSerializer, TestimonialSerializer,
@@ -49,11 +70,12 @@ class AIService:
     def __init__(self):
         self.openai_available = False
         self.cohere_available = False
+        self.flights = SingleFlight()
         
         # Check OpenAI
         openai_key = os.getenv('OPENAI_API_KEY', '')
         if openai_key and len(openai_key) > 10:
-            openai.api_key = openai_key
+            self.openai_client = openai.OpenAI(api_key=openai_key)
             self.openai_available = True
         
         # Check Cohere
@@ -67,61 +89,241 @@ class AIService:
         else:
             self.cohere_available = False
     
-    def chat_with_openai(self, messages, max_tokens=500, temperature=0.7):
+    def chat_with_openai(self, messages, max_tokens=500, temperature=0.7, priority=INTERACTIVE):
         """Chat with OpenAI"""
         if not self.openai_available:
             return None
         
         try:
-            response = openai.ChatCompletion.create(
+            with provider_limits['openai'].slot(priority):
+                response = self.openai_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"OpenAI error: {e}")
+            return None
+    
+    def stream_with_openai(self, messages, max_tokens=500, temperature=0.7, priority=INTERACTIVE):
+        """Stream a chat completion from OpenAI, yielding content deltas
+        
+        Raises if the stream ends without any content, so callers fall back
+        instead of answering with an empty reply.
+        """
+        if not self.openai_available:
+            return
+        
+        # The slot is held for the whole stream
+        with provider_limits['openai'].slot(priority):
+            stream = self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=messages,
                 max_tokens=max_tokens,
                 temperature=temperature,
+                stream=True,
             )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"OpenAI error: {e}")
-            return None
+            received = False
+            try:
+                for chunk in stream:
+                    # The final chunk (and usage chunks) may carry no choices
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        received = True
+                        yield content
+                if not received:
+                    raise RuntimeError("OpenAI stream ended without any content")
+            finally:
+                close = getattr(stream, 'close', None)
+                if close:
+                    close()
     
-    def chat_with_cohere(self, prompt, max_tokens=500, temperature=0.7):
+    def chat_with_cohere(self, prompt, max_tokens=500, temperature=0.7, priority=INTERACTIVE):
         """Chat with Cohere"""
         if not self.cohere_available:
             return None
         
         try:
-            response = self.cohere_client.generate(
-                model='command',
-                prompt=prompt,
-                max_tokens=max_tokens,
-                temperature=temperature,
-            )
+            with provider_limits['cohere'].slot(priority):
+                response = self.cohere_client.generate(
+                    model='command',
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                )
             return response.generations[0].text.strip()
         except Exception as e:
             print(f"Cohere error: {e}")
             return None
     
-    def get_response(self, message, context=None):
+    def get_response(self, message, context=None, allow_remote=True, priority=INTERACTIVE, history=None):
         """Get AI response with fallbacks"""
+        return self.get_response_with_source(
+            message, context, allow_remote, priority=priority, history=history
+        )[0]
+    
+    def get_response_with_source(self, message, context=None, allow_remote=True, cache_scope=None,
+                                 priority=INTERACTIVE, history=None):
+        """Get AI response along with the name of the tier that answered
+        
+        cache_scope is the part of the context cached answers are keyed on;
+        it defaults to the whole context. priority orders the call in the
+        per-provider queue (background jobs yield to interactive chat).
+        history is a list of earlier chat messages sent between the system
+        prompt and the user message; answers then depend on it, so they are
+        neither looked up in nor stored to the response caches.
+        """
+        if cache_scope is None:
+            cache_scope = context
+        
+        cache_key = make_cache_key(message, cache_scope)
+        vector = None
+        if not history:
+            # Repeat questions are answered from cache, never from a paid API
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return cached, 'cache'
+            
+            # Paraphrases of past questions are answered from the semantic cache;
+            # the embedding is kept for storing the answer on a miss
+            vector = semantic_cache.embed(message)
+            cached = semantic_cache.lookup(message, cache_scope, vector)
+            if cached is not None:
+                response_cache.set(cache_key, cached)
+                return cached, 'semantic_cache'
+        
+        # Concurrent identical prompts share a single provider request
+        if allow_remote and (self.openai_available or self.cohere_available):
+            try:
+                response, source = self.flights.do(
+                    self.flight_key(cache_key, history),
+                    lambda: self._call_providers(message, context, cache_key, cache_scope, priority, history, vector),
+                    timeout=getattr(settings, 'AI_COALESCE_TIMEOUT_SECONDS', 30),
+                )
+            except CoalescedCallTimeout as e:
+                print(f"AI coalescing timeout: {e}")
+                response, source = None, None
+            except Exception as e:
+                print(f"AI provider error: {e}")
+                response, source = None, None
+            if response:
+                return response, source
+        
+        # Fallback to rule-based
+        return self.rule_based_response(message, context), 'rule_based'
+    
+    @staticmethod
+    def flight_key(cache_key, history=None):
+        """Coalescing key: identical prompts share a call only with identical history"""
+        if not history:
+            return cache_key
+        history_hash = hashlib.sha256(json.dumps(history).encode('utf-8')).hexdigest()[:16]
+        return f"{cache_key}:{history_hash}"
+    
+    def remember(self, message, cache_key, cache_scope, response, history=None, vector=None):
+        """Store a provider answer in both caches unless it depends on history"""
+        if history:
+            return
+        response_cache.set(cache_key, response)
+        semantic_cache.add(message, cache_scope, response, vector)
+    
+    def build_messages(self, message, context=None, history=None):
+        """Chat messages for OpenAI: system prompt, earlier turns, user message"""
+        return (
+            [{"role": "system", "content": context or "You are a helpful assistant."}]
+            + list(history or [])
+            + [{"role": "user", "content": message}]
+        )
+    
+    def build_prompt(self, message, context=None, history=None):
+        """Plain-text prompt for Cohere"""
+        lines = []
+        for turn in history or []:
+            speaker = {'user': 'User', 'assistant': 'Assistant'}.get(turn['role'], 'Note')
+            lines.append(f"{speaker}: {turn['content']}")
+        earlier = "\n".join(lines) + "\n" if lines else ""
+        return f"{context or 'You are a helpful assistant.'}\n\n{earlier}User: {message}\nAssistant:"
+    
+    def stream_response(self, message, context=None, allow_remote=True, cache_scope=None, history=None):
+        """Yield (source, chunk) pairs, streaming tokens from OpenAI when possible
+        
+        Cached and fallback answers arrive as a single chunk. Closing the
+        generator early cancels the upstream OpenAI request.
+        """
+        if cache_scope is None:
+            cache_scope = context
+        
+        cache_key = make_cache_key(message, cache_scope)
+        vector = None
+        if not history:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                yield 'cache', cached
+                return
+            
+            vector = semantic_cache.embed(message)
+            cached = semantic_cache.lookup(message, cache_scope, vector)
+            if cached is not None:
+                response_cache.set(cache_key, cached)
+                yield 'semantic_cache', cached
+                return
+        
+        if allow_remote and self.openai_available:
+            messages = self.build_messages(message, context, history)
+            parts = []
+            completed = False
+            try:
+                with llm_governor.track():
+                    for chunk in self.stream_with_openai(messages):
+                        parts.append(chunk)
+                        yield 'openai', chunk
+                completed = True
+            except Exception as e:
+                print(f"OpenAI stream error: {e}")
+            if completed and parts:
+                self.remember(message, cache_key, cache_scope, ''.join(parts).strip(), history, vector)
+            if parts:
+                # Never restart a reply the client has already partly seen
+                return
+        
+        # Cohere and rule-based answers arrive in one piece
+        if allow_remote and self.cohere_available:
+            prompt = self.build_prompt(message, context, history)
+            with llm_governor.track():
+                response = self.chat_with_cohere(prompt)
+            if response:
+                self.remember(message, cache_key, cache_scope, response, history, vector)
+                yield 'cohere', response
+                return
+        
+        yield 'rule_based', self.rule_based_response(message, context)
+    
+    def _call_providers(self, message, context, cache_key, cache_scope, priority=INTERACTIVE, history=None,
+                        vector=None):
+        """Call the paid providers in order and cache the first answer"""
         # Try OpenAI first
         if self.openai_available:
-            messages = [
-                {"role": "system", "content": context or "You are a helpful assistant."},
-                {"role": "user", "content": message}
-            ]
-            response = self.chat_with_openai(messages)
+            messages = self.build_messages(message, context, history)
+            with llm_governor.track():
+                response = self.chat_with_openai(messages, priority=priority)
             if response:
-                return response
+                self.remember(message, cache_key, cache_scope, response, history, vector)
+                return response, 'openai'
         
         # Try Cohere next
         if self.cohere_available:
-            prompt = f"{context or 'You are a helpful assistant.'}\n\nUser: {message}\nAssistant:"
-            response = self.chat_with_cohere(prompt)
+            prompt = self.build_prompt(message, context, history)
+            with llm_governor.track():
+                response = self.chat_with_cohere(prompt, priority=priority)
             if response:
-                return response
+                self.remember(message, cache_key, cache_scope, response, history, vector)
+                return response, 'cohere'
         
-        # Fallback to rule-based
-        return self.rule_based_response(message, context)
+        return None, None
     
     def rule_based_response(self, message, context=None):
         """Rule-based responses for fallback"""
@@ -186,18 +388,44 @@ def track_activity(user, action, details=None, request=None):
         user_agent=request.META.get('HTTP_USER_AGENT', '') if request else None
     )
 
+# Countries priced individually; other African countries get the regional rate
+PRICED_COUNTRIES = {
+    'NG': 'Nigeria', 'GH': 'Ghana', 'KE': 'Kenya',
+    'ZA': 'South Africa', 'TZ': 'Tanzania', 'UG': 'Uganda',
+}
+AFRICAN_COUNTRY_CODES = frozenset("""
+DZ AO BJ BW BF BI CV CM CF TD KM CG CD CI DJ EG GQ ER SZ ET GA GM GH GN GW KE
+LS LR LY MG MW ML MR MU YT MA MZ NA NE NG RE RW SH ST SN SC SL SO ZA SS SD TZ
+TG TN UG EH ZM ZW
+""".split())
+
 def detect_user_location(request):
     """Detect user location from IP or headers"""
-    # Simplified detection
     accept_language = request.META.get('HTTP_ACCEPT_LANGUAGE', '').lower()
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        ip = x_forwarded_for.split(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
     
-    # Check for Nigerian/African indicators
+    # Offline IP range table first
+    country_code = geoip.country_code(ip) if ip else None
+    if country_code:
+        if country_code in PRICED_COUNTRIES:
+            country, currency = PRICED_COUNTRIES[country_code], 'NGN'
+        elif country_code in AFRICAN_COUNTRY_CODES:
+            country, currency = 'Africa', 'NGN'
+        else:
+            country, currency = 'International', 'USD'
+        return {
+            'country': country,
+            'currency': currency,
+            'country_code': country_code,
+            'ip': ip
+        }
+    
+    # Fall back to header heuristics for private or unknown addresses
     african_languages = ['yo', 'ha', 'ig', 'sw', 'am', 'fr', 'ar']
     african_keywords = ['nigeria', 'ghana', 'kenya', 'south africa', 'tanzania', 'uganda']
     
@@ -217,49 +445,19 @@ def detect_user_location(request):
     return {
         'country': country,
         'currency': currency,
+        'country_code': None,
         'ip': ip
     }
 
 def calculate_deployment_fee(country, needs_ctb=True, needs_live_classes=False, estimated_students=100):
     """Calculate one-time deployment fee based on client requirements"""
-    if country.lower() in ['nigeria', 'ghana', 'kenya', 'south africa', 'tanzania', 'uganda']:
-        # African countries: ₦5-10 million
-        base_fee = 5000000  # ₦5 million base
-        if needs_ctb and needs_live_classes:
-            base_fee += 2000000  # ₦2 million extra for both modules
-        elif needs_live_classes:
-            base_fee += 1500000  # ₦1.5 million extra for live classes
-        
-        # Scale based on students
-        if estimated_students > 1000:
-            base_fee += 2000000
-        elif estimated_students > 500:
-            base_fee += 1000000
-        elif estimated_students > 200:
-            base_fee += 500000
-            
-        return {
-            'amount': f"₦{base_fee:,.0f}",
-            'currency': 'NGN',
-            'currency_symbol': '₦',
-            'range': '₦5,000,000 - ₦10,000,000',
-            'note': 'One-time deployment fee'
-        }
-    else:
-        # International: $10,000
-        base_fee = 10000  # $10,000 base
-        if needs_ctb and needs_live_classes:
-            base_fee += 3000  # $3,000 extra for both modules
-        elif needs_live_classes:
-            base_fee += 2000  # $2,000 extra for live classes
-        
-        return {
-            'amount': f"${base_fee:,.0f}",
-            'currency': 'USD',
-            'currency_symbol': '$',
-            'range': '$10,000 - $15,000',
-            'note': 'One-time deployment fee'
-        }
+    return pricing_engine.quote(country, needs_ctb, needs_live_classes, estimated_students)
+
+# Memoized system prompts per (country, currency)
+prompt_builder = SystemPromptBuilder(calculate_deployment_fee)
+
+# Rolling summary + recent turns per chat session
+conversation_memory = ConversationMemory(ai_service)
 
 # ============================================================================
 # FEATURE VIEWS
@@ -332,53 +530,25 @@ class ChatBotView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Detect user location and currency
-            location_data = detect_user_location(request)
-            currency = location_data['currency']
-            country = location_data['country']
-            
-            # Get or create chat session
-            session, created = ChatSession.objects.get_or_create(
-                session_id=session_id,
-                defaults={
-                    'ip_address': location_data.get('ip'),
-                    'user_agent': request.META.get('HTTP_USER_AGENT', ''),
-                    'country': country,
-                    'currency': currency,
-                }
-            )
-            
-            # Save user message
-            ChatMessage.objects.create(
-                session=session,
-                message_type='USER',
-                content=message
-            )
+            session, currency, country = self.start_turn(request, session_id, message)
             
             # Generate AI response using unified AI service
-            bot_response = self.generate_response(
+            bot_response, source, degraded = self.generate_response(
                 message=message,
                 currency=currency,
                 country=country,
                 session=session
             )
             
-            # Save bot response
-            ChatMessage.objects.create(
-                session=session,
-                message_type='BOT',
-                content=bot_response
-            )
-            
-            # Update session activity
-            session.last_activity = timezone.now()
-            session.save()
+            self.finish_turn(session, bot_response)
             
             return Response({
                 'response': bot_response,
                 'session_id': session_id,
                 'currency': currency,
                 'country': country,
+                'source': source,
+                'degraded': degraded,
                 'timestamp': timezone.now().isoformat()
             })
             
@@ -389,42 +559,172 @@ class ChatBotView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def start_turn(self, request, session_id, message):
+        """Resolve the visitor's session and store their message"""
+        # Detect user location and currency
+        location_data = detect_user_location(request)
+        currency = location_data['currency']
+        country = location_data['country']
+        
+        # Get or create chat session
+        session, created = ChatSession.objects.get_or_create(
+            session_id=session_id,
+            defaults={
+                'ip_address': location_data.get('ip'),
+                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+                'country': country,
+                'currency': currency,
+            }
+        )
+        
+        # Save user message
+        ChatMessage.objects.create(
+            session=session,
+            message_type='USER',
+            content=message
+        )
+        
+        return session, currency, country
+    
+    def finish_turn(self, session, bot_response):
+        """Store the bot's reply and bump session activity"""
+        # Save bot response
+        ChatMessage.objects.create(
+            session=session,
+            message_type='BOT',
+            content=bot_response
+        )
+        
+        # Update session activity
+        session.last_activity = timezone.now()
+        session.save()
+        
+        # Fold older turns into the rolling summary off the request path
+        conversation_memory.schedule_update(session)
+    
     def generate_response(self, message, currency, country, session):
-        """Generate response using AI service"""
-        # Build context
-        currency_symbol = '₦' if currency == 'NGN' else '$'
-        deployment_fee = calculate_deployment_fee(country)
+        """Generate response using AI service
         
-        context = f"""You are JN Assistant for JavaNet EdTech Suite.
-        Company: JavaNet ICT Solutions Ltd
-        Website: www.javanetict.com
-        Live Demo: ischool.ng
-        Location: {country}
-        Currency: {currency} ({currency_symbol})
-        Deployment Fee: {deployment_fee['amount']} one-time fee
-        
-        Products:
-        1. ctb Testing System - Computer-based testing with automated grading
-        2. Live Classroom Platform - Interactive virtual classrooms
-        
-        Key Features:
-        - White-label/custom branding
-        - One-time deployment fee (no monthly subscriptions)
-        - African countries: ₦5-10 million
-        - International: $10,000 USD
-        - Custom proposal generator
-        - Platform demo simulator
-        
-        Always be helpful, professional, and encourage users to:
-        1. Try the live demo at ischool.ng
-        2. Use the platform simulator
-        3. Generate a custom proposal
-        4. Contact for consultation"""
-        
-        # Use AI service
-        response = ai_service.get_response(message, context)
+        Returns (response, source, degraded). Confident knowledge base
+        matches are answered locally. When the LLM latency budget would be
+        breached the provider call is skipped and the rule-based responder
+        answers instead.
+        """
+        # Answer high-confidence questions straight from the knowledge base
+        local_answer = knowledge_index.answer(message)
+        if local_answer:
+            return local_answer, 'knowledge_base', False
         
-        return response
+        # Static prefix + memoized locale block + retrieved snippets
+        prompt = prompt_builder.build(country, currency, knowledge_index.snippets(message))
+        
+        # Shed load to the rule-based responder when providers are saturated
+        degraded = llm_governor.should_shed()
+        
+        # Use AI service; snippets follow from the message, so cache per locale
+        response, source = ai_service.get_response_with_source(
+            message, prompt.text, allow_remote=not degraded, cache_scope=prompt.scope,
+            history=conversation_memory.history_for(session)
+        )
+        
+        return response, source, degraded
+
+class ChatBotStreamView(ChatBotView):
+    """
+    Streaming variant of the chatbot endpoint using Server-Sent Events
+    
+    Emits a 'meta' event, one 'token' event per provider chunk and a final
+    'done' event. The bot message is persisted only once the stream
+    completes; if the client disconnects the upstream call is cancelled.
+    """
+    
+    def post(self, request):
+        """Stream a chatbot reply"""
+        try:
+            data = request.data
+            session_id = data.get('session_id', str(uuid.uuid4()))
+            message = data.get('message', '').strip()
+            
+            if not message:
+                return Response(
+                    {'error': 'Message is required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            session, currency, country = self.start_turn(request, session_id, message)
+            
+            response = StreamingHttpResponse(
+                self.event_stream(session, session_id, message, currency, country),
+                content_type='text/event-stream'
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+            
+        except Exception as e:
+            print(f"Chatbot stream error: {e}")
+            return Response(
+                {'error': 'Internal server error'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @staticmethod
+    def sse_event(event, data):
+        """Format one Server-Sent Event"""
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    def stream_response(self, message, currency, country, session, degraded):
+        """Yield (source, chunk) pairs for the reply"""
+        # Answer high-confidence questions straight from the knowledge base
+        local_answer = knowledge_index.answer(message)
+        if local_answer:
+            yield 'knowledge_base', local_answer
+            return
+        
+        prompt = prompt_builder.build(country, currency, knowledge_index.snippets(message))
+        yield from ai_service.stream_response(
+            message, prompt.text, allow_remote=not degraded, cache_scope=prompt.scope,
+            history=conversation_memory.history_for(session)
+        )
+    
+    def event_stream(self, session, session_id, message, currency, country):
+        """Relay reply chunks as SSE and persist the reply once complete"""
+        degraded = llm_governor.should_shed()
+        yield self.sse_event('meta', {
+            'session_id': session_id,
+            'currency': currency,
+            'country': country,
+            'degraded': degraded,
+        })
+        
+        parts = []
+        source = None
+        chunks = self.stream_response(message, currency, country, session, degraded)
+        try:
+            for source, chunk in chunks:
+                parts.append(chunk)
+                yield self.sse_event('token', {'text': chunk})
+        except GeneratorExit:
+            print(f"Chat stream for {session_id} cancelled by client")
+            raise
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            yield self.sse_event('error', {'error': 'Internal server error'})
+            return
+        finally:
+            # Closing the provider generator aborts the upstream request
+            chunks.close()
+        
+        bot_response = ''.join(parts)
+        self.finish_turn(session, bot_response)
+        
+        yield self.sse_event('done', {
+            'response': bot_response,
+            'session_id': session_id,
+            'source': source,
+            'degraded': degraded,
+            'timestamp': timezone.now().isoformat()
+        })
 
 # ============================================================================
 # PROPOSAL GENERATOR VIEWS
@@ -433,9 +733,13 @@ class ChatBotView(APIView):
 class ProposalGeneratorView(APIView):
     """
     Proposal Generator with One-time Deployment Fee
+
+    Retries carrying the same Idempotency-Key header get the first response,
+    and repeat requests for the same institution reuse the recent proposal.
     """
     permission_classes = [permissions.AllowAny]
     
+    @idempotent
     def post(self, request):
         """Generate a custom proposal with one-time deployment fee"""
         try:
@@ -458,28 +762,42 @@ class ProposalGeneratorView(APIView):
                 estimated_students=data.get('estimated_students', 100)
             )
             
-            # Create proposal record
-            proposal_request = ProposalRequest.objects.create(
-                name=data['name'],
-                email=data['email'],
-                institution=data['institution'],
-                phone=data.get('phone', ''),
-                country=data['country'],
-                needs_ctb=data.get('needs_ctb', True),
-                needs_live_classes=data.get('needs_live_classes', False),
-                estimated_students=data.get('estimated_students', 100),
-                estimated_teachers=data.get('estimated_teachers', 10),
-                preferred_colors=data.get('preferred_colors', ''),
-                has_logo=data.get('has_logo', False),
-                currency=deployment_fee['currency'],
-                deployment_fee=deployment_fee['amount'],
-                status='GENERATED'
+            details = {
+                'name': data['name'],
+                'phone': data.get('phone', ''),
+                'estimated_students': data.get('estimated_students', 100),
+                'estimated_teachers': data.get('estimated_teachers', 10),
+                'preferred_colors': data.get('preferred_colors', ''),
+                'has_logo': data.get('has_logo', False),
+                'currency': deployment_fee['currency'],
+                'deployment_fee': deployment_fee['amount'],
+            }
+            fingerprint = proposal_fingerprint(
+                data['email'], data['institution'], data['country'],
+                data.get('needs_ctb', True), data.get('needs_live_classes', False),
+                details['estimated_students']
             )
             
+            # Reuse a recent identical proposal, or create the record
+            proposal_request = reuse_recent(fingerprint, details)
+            reused = proposal_request is not None
+            if not reused:
+                proposal_request = ProposalRequest.objects.create(
+                    email=data['email'],
+                    institution=data['institution'],
+                    country=data['country'],
+                    needs_ctb=data.get('needs_ctb', True),
+                    needs_live_classes=data.get('needs_live_classes', False),
+                    status='GENERATED',
+                    fingerprint=fingerprint,
+                    **details
+                )
+            
             return Response({
                 'status': 'success',
                 'message': 'Proposal generated successfully',
                 'proposal_id': proposal_request.id,
+                'reused': reused,
                 'deployment_fee': deployment_fee,
                 'data': ProposalRequestSerializer(proposal_request).data
             })
@@ -516,26 +834,20 @@ class PlatformDemoView(APIView):
             ctb_enabled = data.get('ctb_enabled', True)
             live_classes_enabled = data.get('live_classes_enabled', False)
             
-            # Create demo session
-            demo_session = {
-                'session_id': str(uuid.uuid4()),
-                'institution_name': institution_name,
-                'branding': {
-                    'primary_color': primary_color,
-                    'secondary_color': secondary_color,
-                    'accent_color': accent_color,
-                },
-                'modules': {
-                    'ctb': ctb_enabled,
-                    'live_classes': live_classes_enabled
-                },
-                'created_at': timezone.now().isoformat(),
-                'expires_at': (timezone.now() + timedelta(hours=24)).isoformat()
-            }
+            # Create demo session; the frontend fetches it by id afterwards
+            demo_session = demo_sessions.create(
+                institution_name=institution_name,
+                primary_color=primary_color,
+                secondary_color=secondary_color,
+                accent_color=accent_color,
+                ctb=ctb_enabled,
+                live_classes=live_classes_enabled,
+            )
             
             return Response({
                 'status': 'success',
-                'demo_session': demo_session,
+                'demo_session': demo_session.to_dict(),
+                'theme': demo_theme(demo_session),
                 'message': 'Platform demo generated successfully'
             })
             
@@ -546,26 +858,110 @@ class PlatformDemoView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class PlatformDemoDetailView(APIView):
+    """Fetch a previously generated demo session"""
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, session_id):
+        demo_session = demo_sessions.get(session_id)
+        if demo_session is None:
+            return Response(
+                {'error': 'Demo session not found or expired'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            'status': 'success',
+            'demo_session': demo_session.to_dict(),
+            'theme': demo_theme(demo_session)
+        })
+
+def demo_theme(demo_session):
+    """Theme asset URLs for a demo, or None if its colours are not valid hex"""
+    try:
+        return theme_assets.urls(
+            demo_session.primary_color, demo_session.secondary_color, demo_session.accent_color
+        )
+    except ValueError:
+        return None
+
+class ThemeAssetView(APIView):
+    """Serve a generated theme stylesheet or preview image
+    
+    Asset names are content-hashed, so responses never change and are
+    cached as immutable by browsers and proxies.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    
+    def get(self, request, name, kind):
+        asset = theme_assets.open_asset(name, kind)
+        if asset is None:
+            return Response({'error': 'Theme asset not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        response = FileResponse(asset, content_type=theme_assets.CONTENT_TYPES[kind])
+        response['ETag'] = f'"{name}.{kind}"'
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
 # ============================================================================
 # CURRENCY & LOCALIZATION VIEWS
 # ============================================================================
 
 class CurrencyDetectView(APIView):
-    """Detect user currency and location"""
+    """Detect user currency and location
+    
+    The body depends only on the visitor's country bucket and currency, so
+    it is rendered once per bucket and served with a strong ETag. Browsers
+    revalidate with If-None-Match; nginx may micro-cache it per client for
+    CURRENCY_DETECT_PROXY_SECONDS via X-Accel-Expires.
+    """
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    
+    _rendered = {}  # (country, currency, fee) -> (body, etag)
+    _rendered_lock = threading.Lock()
+    
+    @classmethod
+    def render_bucket(cls, country, currency):
+        # Calculate deployment fee for this location
+        deployment_fee = calculate_deployment_fee(country)
+        key = (country, currency, deployment_fee['amount'])
+        rendered = cls._rendered.get(key)
+        if rendered is None:
+            body = json.dumps({
+                'currency': currency,
+                'country': country,
+                'deployment_fee': deployment_fee,
+                'pricing_model': 'One-time deployment fee (no monthly subscriptions)'
+            }, ensure_ascii=False).encode('utf-8')
+            rendered = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+            with cls._rendered_lock:
+                if len(cls._rendered) > 256:
+                    # Stale fees after a price change; buckets are few
+                    cls._rendered.clear()
+                cls._rendered[key] = rendered
+        return rendered
     
     def get(self, request):
         location_data = detect_user_location(request)
+        body, etag = self.render_bucket(location_data['country'], location_data['currency'])
         
-        # Calculate deployment fee for this location
-        deployment_fee = calculate_deployment_fee(location_data['country'])
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        client_etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        if etag in client_etags or '*' in client_etags:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            del response['Content-Type']
+        else:
+            response = HttpResponse(body, content_type='application/json')
         
-        return Response({
-            'currency': location_data['currency'],
-            'country': location_data['country'],
-            'deployment_fee': deployment_fee,
-            'pricing_model': 'One-time deployment fee (no monthly subscriptions)'
-        })
+        response['ETag'] = etag
+        patch_cache_control(
+            response, private=True,
+            max_age=getattr(settings, 'CURRENCY_DETECT_MAX_AGE', 300),
+        )
+        patch_vary_headers(response, ('Accept-Language', 'X-Forwarded-For'))
+        response['X-Accel-Expires'] = str(getattr(settings, 'CURRENCY_DETECT_PROXY_SECONDS', 10))
+        return response
 
 # ============================================================================
 # HEALTH CHECK VIEW
@@ -584,6 +980,18 @@ class HealthCheckView(APIView):
                 'proposal_generator': 'active',
                 'demo_simulator': 'active'
             },
+            'llm_load': llm_governor.stats(),
+            'response_cache': response_cache.stats(),
+            'semantic_cache': semantic_cache.stats(),
+            'coalescing': ai_service.flights.stats(),
+            'prompts': prompt_builder.stats(),
+            'provider_limits': {name: limiter.stats() for name, limiter in provider_limits.items()},
+            'geoip': geoip.stats(),
+            'pricing': pricing_engine.stats(),
+            'demo_sessions': demo_sessions.stats(),
+            'themes': theme_assets.stats(),
+            'proposal_pdfs': dict(pdf_cache.stats(), rendering=render_queue.stats()),
+            'idempotency': idempotency_store.stats(),
             'pricing_model': 'One-time deployment fee'
         })
 
@@ -613,6 +1021,11 @@ def api_root(request):
             'methods': ['POST'],
             'description': 'AI chatbot (JN Assistant)'
         },
+        'chatbot_stream': {
+            'url': f"{base_url}api/chat/stream/",
+            'methods': ['POST'],
+            'description': 'AI chatbot with Server-Sent Events streaming'
+        },
         'proposal_generator': {
             'url': f"{base_url}api/proposals/generate/",
             'methods': ['POST'],
@@ -3,6 +3,7 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # ============================================================
 # ENV LOADING
@@ -143,6 +144,9 @@ CORS_ALLOWED_ORIGINS = os.getenv(
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Proposal generation endpoints accept an Idempotency-Key header
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
 if DEBUG:
     CORS_ALLOW_ALL_ORIGINS = True
 
@@ -227,6 +231,145 @@ AUTH_USER_MODEL = "users.CustomUser"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 
+# ============================================================
+# AI RESPONSE TUNING
+# ============================================================
+
+# Load shedding: answer from the rule-based responder instead of calling
+# out when the recent p90 latency exceeds the SLO or too many calls are in flight
+AI_LATENCY_SLO_SECONDS = float(os.getenv("AI_LATENCY_SLO_SECONDS", 6))
+AI_MAX_IN_FLIGHT = int(os.getenv("AI_MAX_IN_FLIGHT", 8))
+AI_LATENCY_WINDOW_SECONDS = int(os.getenv("AI_LATENCY_WINDOW_SECONDS", 60))
+
+# Response cache: in-process LRU with TTL, plus an optional shared tier
+# (name of an entry in CACHES) so workers reuse each other's answers.
+# Clearing it (ChatbotConfig changes) reaches every worker only through a
+# cache shared between processes: the shared tier, or a shared "default"
+# cache. With the per-process default cache, other workers keep stale
+# answers for up to AI_RESPONSE_CACHE_TTL_SECONDS.
+AI_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("AI_RESPONSE_CACHE_MAX_ENTRIES", 512))
+AI_RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("AI_RESPONSE_CACHE_TTL_SECONDS", 3600))
+AI_RESPONSE_CACHE_ALIAS = os.getenv("AI_RESPONSE_CACHE_ALIAS") or None
+
+# Semantic cache: reuse answers to paraphrased questions above a cosine
+# similarity threshold. Embedder is "hashing" (local) or "openai".
+AI_SEMANTIC_CACHE_ENABLED = os.getenv("AI_SEMANTIC_CACHE_ENABLED", "True") == "True"
+AI_SEMANTIC_CACHE_EMBEDDER = os.getenv("AI_SEMANTIC_CACHE_EMBEDDER", "hashing")
+AI_SEMANTIC_CACHE_CAPACITY = int(os.getenv("AI_SEMANTIC_CACHE_CAPACITY", 2048))
+AI_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("AI_SEMANTIC_CACHE_THRESHOLD", 0.9))
+AI_SEMANTIC_CACHE_PATH = os.getenv("AI_SEMANTIC_CACHE_PATH", str(BASE_DIR / "cache" / "semantic_cache.npz"))
+
+# Retrieval: BM25 over features, intents and industry responses. Confident
+# matches are answered locally; otherwise the top-k snippets ground the LLM.
+AI_RETRIEVAL_MIN_SCORE = float(os.getenv("AI_RETRIEVAL_MIN_SCORE", 2.5))
+AI_RETRIEVAL_MIN_COVERAGE = float(os.getenv("AI_RETRIEVAL_MIN_COVERAGE", 0.75))
+AI_RETRIEVAL_TOP_K = int(os.getenv("AI_RETRIEVAL_TOP_K", 3))
+AI_RETRIEVAL_REBUILD_SECONDS = int(os.getenv("AI_RETRIEVAL_REBUILD_SECONDS", 300))
+
+# Request coalescing: how long a request waits on an identical in-flight
+# prompt before falling back to the rule-based responder
+AI_COALESCE_TIMEOUT_SECONDS = float(os.getenv("AI_COALESCE_TIMEOUT_SECONDS", 30))
+
+# Provider concurrency: slots per provider and how long interactive and
+# background calls may queue for a slot before falling back
+AI_OPENAI_MAX_CONCURRENCY = int(os.getenv("AI_OPENAI_MAX_CONCURRENCY", 4))
+AI_COHERE_MAX_CONCURRENCY = int(os.getenv("AI_COHERE_MAX_CONCURRENCY", 4))
+AI_PROVIDER_QUEUE_SECONDS = float(os.getenv("AI_PROVIDER_QUEUE_SECONDS", 5))
+AI_PROVIDER_BACKGROUND_QUEUE_SECONDS = float(os.getenv("AI_PROVIDER_BACKGROUND_QUEUE_SECONDS", 30))
+
+# Conversation memory: turns sent verbatim, plus a rolling summary of older
+# turns capped at this many characters
+AI_HISTORY_RECENT_TURNS = int(os.getenv("AI_HISTORY_RECENT_TURNS", 3))
+AI_HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("AI_HISTORY_SUMMARY_MAX_CHARS", 1200))
+
+# ============================================================
+# GEOLOCATION
+# ============================================================
+
+# Offline IP-to-country range table, built with `manage.py update_geoip <csv>`
+GEOIP_DATABASE_PATH = os.getenv("GEOIP_DATABASE_PATH", str(BASE_DIR / "data" / "geoip.bin"))
+
+# ============================================================
+# PRICING
+# ============================================================
+
+# How often each worker checks the pricing tables for changes made elsewhere
+PRICING_CHECK_SECONDS = int(os.getenv("PRICING_CHECK_SECONDS", 30))
+
+# Bulk quotes: rows accepted per upload and rows priced/saved per batch
+BULK_QUOTE_MAX_ROWS = int(os.getenv("BULK_QUOTE_MAX_ROWS", 5000))
+BULK_QUOTE_BATCH_SIZE = int(os.getenv("BULK_QUOTE_BATCH_SIZE", 500))
+
+# Rendered proposal PDFs are cached under MEDIA_ROOT/proposals/rendered and
+# removed after this many days unless a proposal references them
+PROPOSAL_PDF_CACHE_DAYS = int(os.getenv("PROPOSAL_PDF_CACHE_DAYS", 7))
+
+# Internal nginx location serving MEDIA_ROOT. When set, rendered PDFs are
+# sent by nginx via X-Accel-Redirect instead of by Django, e.g.
+#   location /protected-media/ { internal; alias /media/; }
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "")
+
+# Background PDF rendering (?async=true): worker processes per web worker,
+# jobs a web worker will queue, and per-attempt timeout and retries
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", 2))
+PDF_RENDER_MAX_PENDING = int(os.getenv("PDF_RENDER_MAX_PENDING", 50))
+PDF_RENDER_TIMEOUT_SECONDS = int(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", 60))
+PDF_RENDER_RETRIES = int(os.getenv("PDF_RENDER_RETRIES", 1))
+
+# Worker processes for bulk ZIP exports (admin action and export_proposal_pdfs)
+PDF_BULK_WORKERS = int(os.getenv("PDF_BULK_WORKERS", 4))
+
+# Stamp personalized text onto base pages cached per module combination
+# (letterhead, module and scope sections, signature) instead of laying out
+# the whole proposal for every render. Needs pypdf.
+PROPOSAL_PDF_SECTION_CACHE = os.getenv("PROPOSAL_PDF_SECTION_CACHE", "True") == "True"
+
+# Proposal PDF engine: "reportlab" (flowables) or "weasyprint" (HTML/CSS
+# template in templates/proposals/; needs Pango). Compare them with
+# `python manage.py benchmark_pdf --engine reportlab --engine weasyprint`.
+PROPOSAL_PDF_ENGINE = os.getenv("PROPOSAL_PDF_ENGINE", "reportlab")
+
+# Repeat proposal requests (same email, institution, country, modules,
+# student band and details) within this many hours reuse the earlier proposal;
+# 0 disables
+PROPOSAL_DEDUP_WINDOW_HOURS = int(os.getenv("PROPOSAL_DEDUP_WINDOW_HOURS", 24))
+
+# Idempotency-Key handling on proposal generation: how long and how many
+# responses are kept for retries, an optional CACHES alias sharing them
+# across workers, and how long a duplicate waits for the first request
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", 5000))
+IDEMPOTENCY_CACHE_ALIAS = os.getenv("IDEMPOTENCY_CACHE_ALIAS") or None
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 30))
+
+# Proposal PDF images are downscaled to their printed size at this DPI and
+# opaque ones saved as JPEG at this quality, into PDF_ASSET_DIR. Prepare
+# them at deploy time with `python manage.py prepare_pdf_assets`.
+PROPOSAL_PDF_IMAGE_DPI = int(os.getenv("PROPOSAL_PDF_IMAGE_DPI", 150))
+PROPOSAL_PDF_JPEG_QUALITY = int(os.getenv("PROPOSAL_PDF_JPEG_QUALITY", 85))
+PDF_ASSET_DIR = os.getenv("PDF_ASSET_DIR", os.path.join(BASE_DIR, 'cache', 'pdf_assets'))
+
+# Currency detection responses: browser cache lifetime, and how long nginx
+# may micro-cache them (via X-Accel-Expires). The proxy_cache_key must
+# include the client address and Accept-Language, as the body depends on both.
+CURRENCY_DETECT_MAX_AGE = int(os.getenv("CURRENCY_DETECT_MAX_AGE", 300))
+CURRENCY_DETECT_PROXY_SECONDS = int(os.getenv("CURRENCY_DETECT_PROXY_SECONDS", 10))
+
+# ============================================================
+# PLATFORM DEMOS
+# ============================================================
+
+# Demo sessions are kept in memory per worker, and in the database when
+# DEMO_SESSION_DB_TIER is on so any worker can serve them
+DEMO_SESSION_TTL_SECONDS = int(os.getenv("DEMO_SESSION_TTL_SECONDS", 24 * 3600))
+DEMO_SESSION_MAX_ENTRIES = int(os.getenv("DEMO_SESSION_MAX_ENTRIES", 10000))
+DEMO_SESSION_DB_TIER = os.getenv("DEMO_SESSION_DB_TIER", "True") == "True"
+DEMO_SESSION_DB_PURGE_SECONDS = int(os.getenv("DEMO_SESSION_DB_PURGE_SECONDS", 3600))
+
+# Generated theme stylesheets and previews, evicted least-recently-used
+THEME_CACHE_DIR = os.getenv("THEME_CACHE_DIR", str(BASE_DIR / "cache" / "themes"))
+THEME_CACHE_MAX_BYTES = int(os.getenv("THEME_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
 # ============================================================
 # EMAIL
 # ============================================================
@@ -32,4 +32,13 @@ class IntentAdmin(admin.ModelAdmin):
 @admin.register(ChatbotConfig)
 class ChatbotConfigAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_active')
-    list_editable = ('is_active',)
\ No newline at end of file
+    list_editable = ('is_active',)
+    actions = ['clear_ai_response_cache']
+    
+    def clear_ai_response_cache(self, request, queryset):
+        from api.response_cache import response_cache
+        from api.semantic_cache import semantic_cache
+        response_cache.clear()
+        semantic_cache.clear()
+        self.message_user(request, "AI response cache cleared.")
+    clear_ai_response_cache.short_description = "Clear cached AI responses"
\ No newline at end of file
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_chatbotconfig_intent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='summarized_message_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -9,6 +9,11 @@ class ChatSession(models.Model):
     user_info = models.JSONField(blank=True, null=True)  # NEW FIELD
     country = models.CharField(max_length=100, blank=True)
     currency = models.CharField(max_length=3, default='USD')
+    
+    # Rolling summary of messages older than the verbatim window
+    summary = models.TextField(blank=True)
+    summarized_message_count = models.IntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     last_activity = models.DateTimeField(auto_now=True)
     
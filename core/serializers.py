@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Feature, Testimonial, Client, Contact
+from .themes import theme_assets
 
 class FeatureSerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,9 +16,18 @@ class TestimonialSerializer(serializers.ModelSerializer):
         fields = ['id', 'content', 'rating', 'client_name', 'client_country', 'created_at']
 
 class ClientSerializer(serializers.ModelSerializer):
+    theme = serializers.SerializerMethodField()
+    
     class Meta:
         model = Client
         fields = '__all__'
+    
+    def get_theme(self, obj):
+        """Stylesheet and preview URLs for the client's branding colours"""
+        try:
+            return theme_assets.urls(obj.primary_color, obj.secondary_color)
+        except ValueError:
+            return None
 
 
 class ContactSerializer(serializers.ModelSerializer):
@@ -0,0 +1,245 @@
+"""
+Branded theme assets for demos and client portals
+
+Each (primary, secondary, accent) palette gets a CSS bundle of colour
+variants and a PNG preview. Asset names carry the palette and a hash of
+the generated CSS, so URLs are safe to cache forever and any worker can
+regenerate an asset from its name alone. Files are cached on disk and
+evicted least-recently-used once the directory outgrows its budget; a
+file evicted by another worker while it is being served is generated
+again. Lives in core so both core serializers and api views can use it.
+"""
+import colorsys
+import hashlib
+import io
+import os
+import re
+import threading
+from django.conf import settings
+from django.urls import reverse
+
+from PIL import Image, ImageDraw
+
+# Bump when the CSS template or preview layout changes
+THEME_VERSION = 1
+
+DEFAULT_PALETTE = ('#1a237e', '#00c853', '#7b1fa2')
+
+HEX_COLOR = re.compile(r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+ASSET_NAME = re.compile(r'^([0-9a-f]{6})-([0-9a-f]{6})-([0-9a-f]{6})-([0-9a-f]{12})$')
+
+
+def normalize_color(value):
+    """Return '#rrggbb' for '#RGB', 'RRGGBB' and similar inputs"""
+    match = HEX_COLOR.match((value or '').strip())
+    if not match:
+        raise ValueError(f"Invalid hex colour: {value!r}")
+    digits = match.group(1).lower()
+    if len(digits) == 3:
+        digits = ''.join(ch * 2 for ch in digits)
+    return f"#{digits}"
+
+
+def _rgb(color):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def _hex(rgb):
+    return '#' + ''.join(f"{max(0, min(255, round(c))):02x}" for c in rgb)
+
+
+def shade(color, lightness_delta):
+    """Lighten (positive) or darken (negative) a colour in HLS space"""
+    r, g, b = (c / 255 for c in _rgb(color))
+    h, l, s = colorsys.rgb_to_hls(r, g, b)
+    l = max(0.0, min(1.0, l + lightness_delta))
+    return _hex(c * 255 for c in colorsys.hls_to_rgb(h, l, s))
+
+
+def contrast_text(color):
+    """Black or white, whichever reads better on the colour (WCAG luminance)"""
+    def channel(c):
+        c /= 255
+        return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+    r, g, b = (channel(c) for c in _rgb(color))
+    luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    return '#111111' if luminance > 0.179 else '#ffffff'
+
+
+def render_css(primary, secondary, accent):
+    lines = [f"/* JavaNet EdTech Suite theme v{THEME_VERSION} */", ":root {"]
+    for name, color in (('primary', primary), ('secondary', secondary), ('accent', accent)):
+        lines += [
+            f"  --jn-{name}: {color};",
+            f"  --jn-{name}-light: {shade(color, 0.15)};",
+            f"  --jn-{name}-lighter: {shade(color, 0.35)};",
+            f"  --jn-{name}-dark: {shade(color, -0.15)};",
+            f"  --jn-{name}-contrast: {contrast_text(color)};",
+        ]
+    lines.append("}")
+    for name in ('primary', 'secondary', 'accent'):
+        lines += [
+            f".jn-bg-{name} {{ background-color: var(--jn-{name}); color: var(--jn-{name}-contrast); }}",
+            f".jn-text-{name} {{ color: var(--jn-{name}); }}",
+            f".jn-border-{name} {{ border-color: var(--jn-{name}); }}",
+            f".jn-btn-{name} {{ background-color: var(--jn-{name}); color: var(--jn-{name}-contrast); "
+            f"border: 1px solid var(--jn-{name}-dark); }}",
+            f".jn-btn-{name}:hover {{ background-color: var(--jn-{name}-dark); }}",
+        ]
+    lines += [
+        ".jn-header { background: linear-gradient(90deg, var(--jn-primary), var(--jn-primary-light)); "
+        "color: var(--jn-primary-contrast); }",
+        ".jn-sidebar { background-color: var(--jn-primary-dark); color: var(--jn-primary-contrast); }",
+        ".jn-link { color: var(--jn-accent); }",
+        ".jn-badge { background-color: var(--jn-accent-lighter); color: var(--jn-accent-dark); }",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_preview(primary, secondary, accent, size=(480, 270)):
+    """PNG mock of the platform chrome in the given palette"""
+    width, height = size
+    image = Image.new('RGB', size, '#f5f6fa')
+    draw = ImageDraw.Draw(image)
+    header = height // 7
+    sidebar = width // 5
+    draw.rectangle([0, 0, width, header], fill=primary)
+    draw.rectangle([0, header, sidebar, height], fill=shade(primary, -0.15))
+    for i in range(4):
+        top = header + 16 + i * 28
+        draw.rounded_rectangle([12, top, sidebar - 12, top + 14], radius=4, fill=shade(primary, 0.15))
+    # Content cards
+    for i in range(2):
+        left = sidebar + 20 + i * ((width - sidebar - 40) // 2 + 10)
+        right = left + (width - sidebar - 60) // 2
+        draw.rounded_rectangle([left, header + 20, right, height - 70], radius=8, fill='#ffffff',
+                               outline=shade(secondary, 0.3))
+        draw.rectangle([left + 12, header + 36, right - 40, header + 46], fill=shade(primary, 0.35))
+        draw.rounded_rectangle([left + 12, height - 110, left + 80, height - 86], radius=6, fill=secondary)
+    draw.rounded_rectangle([width - 120, height - 50, width - 20, height - 20], radius=8, fill=accent)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+class ThemeAssetCache:
+    """Content-hashed theme assets with a size-bounded LRU directory"""
+
+    CONTENT_TYPES = {'css': 'text/css; charset=utf-8', 'png': 'image/png'}
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = str(root or getattr(settings, 'THEME_CACHE_DIR', ''))
+        self.max_bytes = max_bytes or getattr(settings, 'THEME_CACHE_MAX_BYTES', 50 * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._names = {}  # palette -> asset name
+        self._generated = 0
+        self._evicted = 0
+
+    def asset_name(self, primary=None, secondary=None, accent=None):
+        """Stable asset name for a palette; raises ValueError on bad colours"""
+        palette = tuple(
+            normalize_color(color) if color else default
+            for color, default in zip((primary, secondary, accent), DEFAULT_PALETTE)
+        )
+        name = self._names.get(palette)
+        if name is None:
+            digest = hashlib.sha256(render_css(*palette).encode('utf-8')).hexdigest()[:12]
+            name = '-'.join(color[1:] for color in palette) + f"-{digest}"
+            with self._lock:
+                if len(self._names) > 4096:
+                    self._names.clear()
+                self._names[palette] = name
+        return name
+
+    def urls(self, primary=None, secondary=None, accent=None):
+        name = self.asset_name(primary, secondary, accent)
+        return {
+            'css_url': reverse('theme-asset', kwargs={'name': name, 'kind': 'css'}),
+            'preview_url': reverse('theme-asset', kwargs={'name': name, 'kind': 'png'}),
+        }
+
+    def path_for(self, name, kind):
+        """Return the on-disk path of an asset, generating it if needed
+
+        Returns None when the name is malformed or was produced by a
+        different theme version.
+        """
+        match = ASSET_NAME.match(name)
+        if not match or kind not in self.CONTENT_TYPES:
+            return None
+        palette = tuple(f"#{color}" for color in match.groups()[:3])
+        if self.asset_name(*palette) != name:
+            return None
+
+        path = os.path.join(self.root, f"{name}.{kind}")
+        try:
+            # Bump mtime so eviction sees the file as recently used
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        content = render_css(*palette).encode('utf-8') if kind == 'css' else render_preview(*palette)
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._generated += 1
+        self._evict()
+        return path
+
+    def open_asset(self, name, kind):
+        """Open an asset for reading, or return None for an unknown name
+
+        Another worker's eviction can delete the file between path_for()
+        and open(); it is then generated again rather than reported missing.
+        """
+        for _ in range(3):
+            path = self.path_for(name, kind)
+            if path is None:
+                return None
+            try:
+                return open(path, 'rb')
+            except FileNotFoundError:
+                continue
+        raise FileNotFoundError(f"Theme asset {name}.{kind} keeps disappearing from {self.root}")
+
+    def _evict(self):
+        """Delete least recently used assets until the directory fits its budget"""
+        with self._lock:
+            try:
+                entries = []
+                total = 0
+                with os.scandir(self.root) as it:
+                    for entry in it:
+                        if entry.is_file() and not entry.name.endswith('.tmp'):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, stat.st_size, entry.path))
+                            total += stat.st_size
+                if total <= self.max_bytes:
+                    return
+                for _, size, path in sorted(entries):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    self._evicted += 1
+                    total -= size
+                    if total <= self.max_bytes * 0.9:
+                        break
+            except OSError as e:
+                print(f"Theme cache eviction error: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'palettes': len(self._names),
+                'generated': self._generated,
+                'evicted': self._evicted,
+            }
+
+
+# Create singleton instance
+theme_assets = ThemeAssetCache()
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import ProposalRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import ProposalRequest, PricingRegion, PricingRule
+from .archive import render_proposals, iter_zip
 from django.utils.html import format_html
 
 @admin.register(ProposalRequest)
@@ -53,7 +56,7 @@ class ProposalRequestAdmin(admin.ModelAdmin):
             obj.status = 'GENERATED'
         super().save_model(request, obj, form, change)
     
-    actions = ['mark_as_sent', 'mark_as_viewed', 'mark_as_expired']
+    actions = ['mark_as_sent', 'mark_as_viewed', 'mark_as_expired', 'download_pdfs', 'regenerate_pdfs']
     
     def mark_as_sent(self, request, queryset):
         queryset.update(status='SENT')
@@ -68,4 +71,40 @@ class ProposalRequestAdmin(admin.ModelAdmin):
     def mark_as_expired(self, request, queryset):
         queryset.update(status='EXPIRED')
         self.message_user(request, f"{queryset.count()} proposals marked as expired.")
-    mark_as_expired.short_description = "Mark selected proposals as expired"
\ No newline at end of file
+    mark_as_expired.short_description = "Mark selected proposals as expired"
+
+    def _pdf_zip_response(self, queryset, reuse_existing):
+        proposals = list(queryset.order_by('created_at'))
+        reuse = {}
+        if reuse_existing:
+            reuse = {str(p.pk): p.proposal_pdf.name for p in proposals if p.proposal_pdf}
+        response = StreamingHttpResponse(
+            iter_zip(render_proposals(proposals, reuse=reuse)), content_type='application/zip'
+        )
+        filename = f"proposals_{timezone.now().strftime('%Y%m%d_%H%M')}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def download_pdfs(self, request, queryset):
+        # Existing PDFs are reused, so re-running after an interrupted download is cheap
+        return self._pdf_zip_response(queryset, reuse_existing=True)
+    download_pdfs.short_description = "Download PDFs of selected proposals (ZIP)"
+
+    def regenerate_pdfs(self, request, queryset):
+        # PDFs rendered earlier today are cache hits, so an interrupted run resumes
+        return self._pdf_zip_response(queryset, reuse_existing=False)
+    regenerate_pdfs.short_description = "Regenerate PDFs of selected proposals (ZIP)"
+
+
+class PricingRuleInline(admin.TabularInline):
+    model = PricingRule
+    extra = 0
+    fields = ('rule_type', 'modules', 'min_students', 'amount', 'is_active')
+
+
+@admin.register(PricingRegion)
+class PricingRegionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code', 'currency', 'base_fee', 'is_default', 'updated_at')
+    search_fields = ('name', 'code')
+    readonly_fields = ('updated_at',)
+    inlines = [PricingRuleInline]
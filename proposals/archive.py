@@ -0,0 +1,131 @@
+"""
+Bulk proposal PDF export as a streamed ZIP
+
+Proposals are rendered in a pool of worker processes, a bounded number at
+a time, and each PDF goes through the content-addressed PDF cache before
+being copied into the archive. The ZIP is written to a non-seekable
+stream (entries use data descriptors), so a response can send each file
+as soon as it is ready and only a handful of PDFs are ever held in memory.
+
+A run can be resumed: PDFs already rendered today are cache hits, and
+callers may pass previously produced files to reuse instead of rendering.
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from django.conf import settings
+
+from .models import ProposalRequest
+from .pdf_cache import pdf_cache, cache_key
+from .renderers import render_proposal_pdf, get_renderer
+
+
+def archive_name(proposal):
+    """File name of a proposal inside the ZIP, as the single download names it"""
+    return f"Proposal_{proposal.pk}_{proposal.institution.replace(' ', '_').replace('/', '_')}.pdf"
+
+
+def render_proposals(proposals, workers=None, reuse=None):
+    """Yield (proposal, storage_name, error) for each proposal, in completion order
+
+    reuse maps proposal ids to storage names of PDFs that may be used as
+    they are. Everything else is rendered (or found in the cache) and
+    attached to its proposal without touching the proposal's status.
+    """
+    workers = workers or getattr(settings, 'PDF_BULK_WORKERS', 4)
+    reuse = reuse or {}
+    executor = None
+    pending = {}
+
+    def finish(future):
+        proposal, key = pending.pop(future)
+        try:
+            pdf_cache.put(key, future.result())
+        except Exception as e:
+            return proposal, None, str(e)
+        name = pdf_cache.name_for(key)
+        ProposalRequest.objects.filter(pk=proposal.pk).update(proposal_pdf=name)
+        return proposal, name, None
+
+    try:
+        for proposal in proposals:
+            name = reuse.get(str(proposal.pk))
+            if name and os.path.exists(os.path.join(pdf_cache.root, name)):
+                yield proposal, name, None
+                continue
+            pdf_data = proposal.get_proposal_data()
+            key = cache_key(pdf_data)
+            if pdf_cache.get(key) is not None:
+                name = pdf_cache.name_for(key)
+                if proposal.proposal_pdf.name != name:
+                    ProposalRequest.objects.filter(pk=proposal.pk).update(proposal_pdf=name)
+                yield proposal, name, None
+                continue
+
+            if executor is None:
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=get_renderer,
+                )
+            pending[executor.submit(render_proposal_pdf, pdf_data)] = (proposal, key)
+            # Keep every worker busy without queueing the whole month
+            while len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield finish(future)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _ZipStream:
+    """Write-only file object collecting ZIP output for a generator to drain"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(results, on_entry=None):
+    """Yield ZIP bytes for render_proposals output
+
+    on_entry(proposal, storage_name) is called once each PDF is in the
+    archive; failures are listed in an errors.txt entry at the end.
+    """
+    stream = _ZipStream()
+    errors = []
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+        for proposal, name, error in results:
+            if error:
+                errors.append(f"{proposal.pk}\t{proposal.institution}\t{error}")
+                continue
+            archive.write(os.path.join(pdf_cache.root, name), archive_name(proposal))
+            if on_entry is not None:
+                on_entry(proposal, name)
+            yield stream.drain()
+        if errors:
+            archive.writestr('errors.txt', "\n".join(errors) + "\n")
+    yield stream.drain()
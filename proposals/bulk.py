@@ -0,0 +1,195 @@
+"""
+Bulk deployment fee quotes for partner spreadsheets
+
+Rows come from a CSV or a JSON array, are priced in batches through
+PricingEngine.quote_many and written back out as CSV. Optionally the
+valid rows are stored as ProposalRequest rows, one bulk_create per batch,
+all in a single transaction that completes before any output is sent.
+"""
+import csv
+import io
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .dedup import proposal_fingerprint
+from .models import ProposalRequest
+from .pricing import pricing_engine
+
+INPUT_FIELDS = [
+    'name', 'email', 'institution', 'phone', 'country',
+    'needs_ctb', 'needs_live_classes', 'estimated_students', 'estimated_teachers',
+]
+OUTPUT_FIELDS = [
+    'row', 'institution', 'country', 'needs_ctb', 'needs_live_classes', 'estimated_students',
+    'region', 'currency', 'deployment_fee', 'fee_value', 'proposal_id', 'error',
+]
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+class BulkQuoteError(ValueError):
+    """Raised when the uploaded rows cannot be read at all"""
+
+
+def as_bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _as_int(value, default):
+    if value is None or value == '':
+        return default
+    try:
+        return int(float(str(value).replace(',', '')))
+    except ValueError:
+        return None
+
+
+def parse_rows(content, content_type=''):
+    """Return a list of row dicts from CSV text, JSON text or decoded JSON"""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if isinstance(content, str):
+        text = content.strip()
+        if 'json' in content_type or text.startswith(('[', '{')):
+            try:
+                content = json.loads(text)
+            except ValueError as e:
+                raise BulkQuoteError(f"Invalid JSON: {e}")
+        else:
+            reader = csv.DictReader(io.StringIO(text))
+            if not reader.fieldnames or 'country' not in [f.strip().lower() for f in reader.fieldnames]:
+                raise BulkQuoteError("CSV needs a header row with at least a 'country' column")
+            content = [
+                {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+                for row in reader
+            ]
+    if isinstance(content, dict):
+        content = content.get('rows')
+    if not isinstance(content, list) or not all(isinstance(row, dict) for row in content):
+        raise BulkQuoteError("Expected a CSV file or a JSON array of objects")
+
+    max_rows = getattr(settings, 'BULK_QUOTE_MAX_ROWS', 5000)
+    if len(content) > max_rows:
+        raise BulkQuoteError(f"Too many rows: {len(content)} (limit {max_rows})")
+    return content
+
+
+def clean_row(row, create):
+    """Normalize one input row; returns (fields, error)"""
+    fields = {field: row.get(field) for field in INPUT_FIELDS}
+    fields['country'] = str(fields['country'] or '').strip()
+    fields['institution'] = str(fields['institution'] or '').strip()
+    fields['needs_ctb'] = as_bool(fields['needs_ctb'], True)
+    fields['needs_live_classes'] = as_bool(fields['needs_live_classes'], False)
+    fields['estimated_students'] = _as_int(fields['estimated_students'], 100)
+    fields['estimated_teachers'] = _as_int(fields['estimated_teachers'], 10)
+
+    if not fields['country']:
+        return fields, 'country is required'
+    if fields['estimated_students'] is None or fields['estimated_teachers'] is None:
+        return fields, 'estimated_students and estimated_teachers must be numbers'
+    if fields['estimated_students'] < 0 or fields['estimated_teachers'] < 0:
+        return fields, 'estimated_students and estimated_teachers cannot be negative'
+    if create:
+        for field in ('name', 'email', 'institution'):
+            if not fields[field]:
+                return fields, f'{field} is required'
+        for field in ('name', 'email', 'institution', 'country'):
+            max_length = ProposalRequest._meta.get_field(field).max_length
+            if len(str(fields[field])) > max_length:
+                return fields, f'{field} is longer than {max_length} characters'
+        try:
+            validate_email(fields['email'])
+        except ValidationError:
+            return fields, 'email is invalid'
+    return fields, ''
+
+
+def quote_rows(rows, create=False, batch_size=None, ip_address=None):
+    """Return one output dict per input row, pricing and saving batch by batch
+
+    With create, every valid row is inserted before this returns, or none is.
+    """
+    if not create:
+        return list(_quote_batches(rows, False, batch_size, ip_address))
+    with transaction.atomic():
+        return list(_quote_batches(rows, True, batch_size, ip_address))
+
+
+def _quote_batches(rows, create, batch_size, ip_address):
+    batch_size = batch_size or getattr(settings, 'BULK_QUOTE_BATCH_SIZE', 500)
+    for offset in range(0, len(rows), batch_size):
+        cleaned = [clean_row(row, create) for row in rows[offset:offset + batch_size]]
+        valid = [fields for fields, error in cleaned if not error]
+        quotes = iter(pricing_engine.quote_many(
+            (f['country'], f['needs_ctb'], f['needs_live_classes'], f['estimated_students'])
+            for f in valid
+        ))
+
+        results, proposals = [], []
+        for number, (fields, error) in enumerate(cleaned, start=offset + 1):
+            result = {
+                'row': number,
+                'institution': fields['institution'],
+                'country': fields['country'],
+                'needs_ctb': fields['needs_ctb'],
+                'needs_live_classes': fields['needs_live_classes'],
+                'estimated_students': fields['estimated_students'],
+                'error': error,
+            }
+            if not error:
+                quote = next(quotes)
+                result.update({
+                    'region': quote['region'],
+                    'currency': quote['currency'],
+                    'deployment_fee': quote['amount'],
+                    'fee_value': quote['value'],
+                })
+                if create:
+                    proposal = ProposalRequest(
+                        name=fields['name'],
+                        email=fields['email'],
+                        institution=fields['institution'],
+                        phone=str(fields['phone'] or '')[:20],
+                        country=fields['country'],
+                        needs_ctb=fields['needs_ctb'],
+                        needs_live_classes=fields['needs_live_classes'],
+                        estimated_students=fields['estimated_students'],
+                        estimated_teachers=fields['estimated_teachers'],
+                        currency=quote['currency'],
+                        deployment_fee=quote['amount'],
+                        status='GENERATED',
+                        ip_address=ip_address,
+                        fingerprint=proposal_fingerprint(
+                            fields['email'], fields['institution'], fields['country'],
+                            fields['needs_ctb'], fields['needs_live_classes'], fields['estimated_students']
+                        ),
+                    )
+                    proposals.append(proposal)
+                    result['proposal_id'] = str(proposal.id)
+            results.append(result)
+
+        if proposals:
+            ProposalRequest.objects.bulk_create(proposals, batch_size=batch_size)
+        yield from results
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(results):
+    """Yield CSV lines (header first) for quote_rows output"""
+    writer = csv.DictWriter(_Echo(), fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+    yield writer.writeheader()
+    for result in results:
+        yield writer.writerow(result)
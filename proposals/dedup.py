@@ -0,0 +1,74 @@
+"""
+Reuse of recent proposals for repeat requests
+
+Requests are fingerprinted on the requester's email, the institution,
+the country, the modules chosen and the priced student band, all
+normalized. A request whose fingerprint and details both match a
+proposal updated within PROPOSAL_DEDUP_WINDOW_HOURS reuses that row
+instead of inserting a new one, so its rendered PDF stays a cache hit.
+Existing rows are never modified beyond updated_at: the endpoints are
+anonymous, so a request with other details gets a row of its own.
+"""
+import hashlib
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .models import ProposalRequest
+from .pricing import pricing_engine, normalize_country, module_key
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Details outside the fingerprint that must also match for a row to be
+# reused, including the current quote, so a price change gets a new row
+DETAIL_FIELDS = [
+    'name', 'phone', 'estimated_students', 'estimated_teachers', 'preferred_colors', 'has_logo',
+    'currency', 'deployment_fee',
+]
+
+
+def _normalize_text(value):
+    return _WHITESPACE.sub(' ', str(value or '')).strip().lower()
+
+
+def proposal_fingerprint(email, institution, country, needs_ctb, needs_live_classes, estimated_students):
+    """Fingerprint of the parameters that make two proposal requests the same"""
+    parts = [
+        _normalize_text(email),
+        _normalize_text(institution),
+        normalize_country(country),
+        module_key(needs_ctb, needs_live_classes),
+        str(pricing_engine.student_band(country, estimated_students)),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+
+def reuse_recent(fingerprint, details):
+    """Return the latest proposal with this fingerprint and details inside the window, or None
+
+    details maps DETAIL_FIELDS to the requested values. Only the reused
+    row's updated_at is touched, which also extends its window.
+    """
+    window_hours = getattr(settings, 'PROPOSAL_DEDUP_WINDOW_HOURS', 24)
+    if not fingerprint or window_hours <= 0:
+        return None
+    try:
+        matching = {
+            field: ProposalRequest._meta.get_field(field).to_python(value)
+            for field, value in details.items()
+        }
+    except ValidationError:
+        return None
+    proposal = ProposalRequest.objects.filter(
+        fingerprint=fingerprint,
+        updated_at__gte=timezone.now() - timedelta(hours=window_hours),
+        **matching
+    ).order_by('-updated_at').first()
+    if proposal is None:
+        return None
+
+    proposal.updated_at = timezone.now()
+    ProposalRequest.objects.filter(pk=proposal.pk).update(updated_at=proposal.updated_at)
+    return proposal
@@ -0,0 +1,115 @@
+"""
+HTTP delivery of generated files with validators and byte ranges
+
+Supports If-None-Match (304), single byte ranges with If-Range (206/416)
+and otherwise streams the whole file with FileResponse. With
+MEDIA_ACCEL_REDIRECT_PREFIX set, files under MEDIA_ROOT are handed to
+nginx with X-Accel-Redirect instead, so no worker time or memory is spent
+sending them.
+"""
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _etag_matches(header, etag):
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return etag in tags or '*' in tags
+
+
+def _read_range(f, length):
+    try:
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def _parse_range(header, size):
+    """Return (start, end) inclusive, None to ignore the header, or False if unsatisfiable"""
+    match = RANGE_HEADER.match(header.strip())
+    if not match:
+        # Multiple ranges or other units: serve the full file instead
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def accel_redirect_uri(path):
+    """Internal nginx URI for a file under MEDIA_ROOT, or None if not configured"""
+    prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    if not prefix:
+        return None
+    relative = os.path.relpath(path, settings.MEDIA_ROOT)
+    if relative.startswith(os.pardir):
+        return None
+    return f"{prefix.rstrip('/')}/{quote(relative.replace(os.sep, '/'))}"
+
+
+def file_response(request, path, filename, etag, content_type='application/pdf',
+                  cache_control='private, max-age=3600'):
+    """Serve path as an attachment with ETag and Range support"""
+    etag = f'"{etag}"'
+    size = os.path.getsize(path)
+    accel_uri = accel_redirect_uri(path)
+
+    if _etag_matches(request.META.get('HTTP_IF_NONE_MATCH', ''), etag):
+        response = HttpResponse(status=304)
+        del response['Content-Type']
+    elif accel_uri:
+        # nginx sends the file and answers Range requests itself
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_uri
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    else:
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if range_header and (not if_range or if_range.strip() == etag):
+            byte_range = _parse_range(range_header, size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range:
+            start, end = byte_range
+            f = open(path, 'rb')
+            f.seek(start)
+            response = StreamingHttpResponse(
+                _read_range(f, end - start + 1), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Disposition'] = content_disposition_header(True, filename)
+        else:
+            response = FileResponse(
+                open(path, 'rb'), content_type=content_type,
+                as_attachment=True, filename=filename,
+            )
+
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = cache_control
+    return response
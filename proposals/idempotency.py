@@ -0,0 +1,203 @@
+"""
+Idempotency-Key support for proposal generation endpoints
+
+A client that sends an Idempotency-Key header gets the response of the
+first request with that key on every retry, without the view running
+again (no repeated validation, pricing, inserts or renders). Responses
+are kept as compact (fingerprint, status, content type, body) tuples in
+a bounded in-process LRU with TTL, optionally backed by a shared Django
+cache (IDEMPOTENCY_CACHE_ALIAS) so retries landing on another worker are
+answered too. Concurrent requests with the same key in a process wait
+for the first one. Reusing a key for a different request body is
+rejected with 422.
+"""
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from rest_framework.renderers import JSONRenderer
+
+from api.singleflight import SingleFlight, CoalescedCallTimeout
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """Hash of the parsed request body, to detect a key reused for another request"""
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class IdempotencyStore:
+    """Stored responses by idempotency key, with single-flight for concurrent retries"""
+
+    def __init__(self, max_entries=None, ttl_seconds=None, shared_alias=None, wait_seconds=None):
+        self.max_entries = max_entries or getattr(settings, 'IDEMPOTENCY_MAX_ENTRIES', 5000)
+        self.ttl_seconds = ttl_seconds or getattr(settings, 'IDEMPOTENCY_TTL_SECONDS', 24 * 3600)
+        self.shared_alias = shared_alias or getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', None)
+        self.wait_seconds = wait_seconds or getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 30)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, entry)
+        self._flights = SingleFlight()
+        self._replayed = 0
+        self._stored = 0
+        self._conflicts = 0
+
+    def _shared(self):
+        if not self.shared_alias:
+            return None
+        try:
+            return caches[self.shared_alias]
+        except Exception as e:
+            print(f"Idempotency store: shared tier unavailable: {e}")
+            return None
+
+    @staticmethod
+    def _shared_key(key):
+        return f"idempotency:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+    def get(self, key):
+        """Return the stored (fingerprint, status, content_type, body) for key, or None"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._entries.move_to_end(key)
+                    return item[1]
+                del self._entries[key]
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                entry = shared.get(self._shared_key(key))
+            except Exception as e:
+                print(f"Idempotency store: shared get failed: {e}")
+                entry = None
+            if entry is not None:
+                self._store_local(key, entry)
+                return entry
+        return None
+
+    def set(self, key, entry):
+        self._store_local(key, entry)
+        with self._lock:
+            self._stored += 1
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(self._shared_key(key), entry, self.ttl_seconds)
+            except Exception as e:
+                print(f"Idempotency store: shared set failed: {e}")
+
+    def _store_local(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def capture(response, fingerprint):
+        """Entry for a response worth replaying, or None
+
+        Server errors are not kept, so a retry after one runs the view again.
+        """
+        if response.status_code >= 500 or getattr(response, 'streaming', False):
+            return None
+        if hasattr(response, 'data'):
+            # DRF Response, not rendered yet
+            return (fingerprint, response.status_code, 'application/json',
+                    JSONRenderer().render(response.data))
+        return (fingerprint, response.status_code, response.get('Content-Type'), response.content)
+
+    def replay(self, entry, fingerprint):
+        if entry[0] != fingerprint:
+            with self._lock:
+                self._conflicts += 1
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Idempotency-Key was already used for a different request'
+            }, status=422)
+        with self._lock:
+            self._replayed += 1
+        response = HttpResponse(entry[3], status=entry[1], content_type=entry[2])
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def run(self, key, fingerprint, view):
+        """Response for the request identified by key, calling view() at most once"""
+        entry = self.get(key)
+        if entry is not None:
+            return self.replay(entry, fingerprint)
+
+        first = {}
+
+        def run_view():
+            # Another worker may have finished it since the first lookup
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+            response = first['response'] = view()
+            entry = self.capture(response, fingerprint)
+            if entry is not None:
+                self.set(key, entry)
+            return entry
+
+        try:
+            entry = self._flights.do(key, run_view, timeout=self.wait_seconds)
+        except CoalescedCallTimeout:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'A request with this Idempotency-Key is still being processed'
+            }, status=409, headers={'Retry-After': '1'})
+        if 'response' in first:
+            return first['response']
+        if entry is None:
+            # The first request failed and was not stored: this one retries it
+            return view()
+        return self.replay(entry, fingerprint)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'stored': self._stored,
+                'replayed': self._replayed,
+                'conflicts': self._conflicts,
+                'shared_tier': bool(self.shared_alias),
+            }
+
+
+# Create singleton instance
+idempotency_store = IdempotencyStore()
+
+
+def idempotent(method):
+    """Make an APIView handler honour the Idempotency-Key request header
+
+    Keys are scoped to the request path, so the same key sent to two
+    endpoints names two requests.
+    """
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(HEADER, '').strip()
+        if not key:
+            return method(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'
+            }, status=400)
+        return idempotency_store.run(
+            f"{request.path}:{key}", request_fingerprint(request),
+            lambda: method(view, request, *args, **kwargs),
+        )
+    return wrapper
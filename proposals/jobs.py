@@ -0,0 +1,227 @@
+"""
+Background proposal PDF rendering
+
+Render jobs run in a pool of worker processes so ReportLab's CPU time
+never holds a web worker. A job's id is its PDF cache key: the rendered
+file on disk is the source of truth for "done", and a small JSON state
+file beside it records queued/running/failed, so any web worker on the
+host can answer status requests. Each web worker accepts a bounded
+number of pending jobs; a job that fails or exceeds its timeout is
+retried, and a hung worker process is replaced.
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.db import close_old_connections
+
+from .pdf_cache import pdf_cache, cache_key
+from .renderers import render_proposal_pdf, get_renderer
+
+
+class RenderQueueFull(Exception):
+    """Raised when this worker already has the maximum number of pending jobs"""
+
+
+def _init_worker(pids):
+    """Report this worker's pid so a hung pool can be killed, then build the template"""
+    pids.put(os.getpid())
+    get_renderer()
+
+
+class PDFRenderQueue:
+    """Bounded queue of PDF render jobs backed by a process pool"""
+
+    def __init__(self, workers=None, max_pending=None, timeout=None, retries=None):
+        self.workers = workers or getattr(settings, 'PDF_RENDER_WORKERS', 2)
+        self.max_pending = max_pending or getattr(settings, 'PDF_RENDER_MAX_PENDING', 50)
+        self.timeout = timeout or getattr(settings, 'PDF_RENDER_TIMEOUT_SECONDS', 60)
+        self.retries = retries if retries is not None else getattr(settings, 'PDF_RENDER_RETRIES', 1)
+
+        self._lock = threading.Lock()
+        self._pool = None
+        # Worker pids reported by _init_worker; one queue for every pool, since a
+        # worker still starting up when its pool is reset unpickles it later
+        self._pid_queue = None
+        # One dispatcher thread per process, so a job's timeout covers rendering only
+        self._dispatchers = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pdf-render')
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._retried = 0
+        atexit.register(self.shutdown)
+
+    # ------------------------------------------------------------------
+    # Process pool
+    # ------------------------------------------------------------------
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context('spawn')
+                if self._pid_queue is None:
+                    self._pid_queue = context.Queue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    # Build the proposal template before the first job arrives
+                    initializer=_init_worker,
+                    initargs=(self._pid_queue,),
+                )
+            return self._pool
+
+    @staticmethod
+    def _drain_pids(pid_queue):
+        pids = set()
+        while True:
+            try:
+                pids.add(pid_queue.get(timeout=0.1))
+            except queue.Empty:
+                return pids
+
+    def _reset_pool(self, pool):
+        """Kill a pool with a hung or crashed worker; the next job starts a new one"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        # Workers never exit on their own while their pool runs, so the pids
+        # reported since the last reset are this pool's
+        for pid in self._drain_pids(self._pid_queue):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self._dispatchers.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Job state
+    # ------------------------------------------------------------------
+
+    def _state_path(self, key):
+        return pdf_cache.path_for(key)[:-len('.pdf')] + '.json'
+
+    def _write_state(self, key, **state):
+        state['updated_at'] = time.time()
+        path = self._state_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _read_state(self, key):
+        try:
+            with open(self._state_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_stale(self, state):
+        # A job whose web worker died never finishes; allow resubmission
+        budget = self.timeout * (self.retries + 1) + 60
+        return time.time() - state.get('updated_at', 0) > budget
+
+    def status(self, key):
+        """Job status dict, or None for an unknown job id"""
+        state = self._read_state(key)
+        if pdf_cache.get(key) is not None:
+            return dict(state or {}, status='done', error=None)
+        if state is None:
+            return None
+        if state['status'] in ('queued', 'running') and self._is_stale(state):
+            state['status'] = 'failed'
+            state['error'] = 'Render job was interrupted'
+        return state
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def submit(self, pdf_data, proposal_id=None):
+        """Queue pdf_data for rendering and return the job id"""
+        key = cache_key(pdf_data)
+        if pdf_cache.get(key) is not None:
+            if proposal_id:
+                pdf_cache.attach(proposal_id, key)
+            return key
+        state = self._read_state(key)
+        if state and state['status'] in ('queued', 'running') and not self._is_stale(state):
+            return key
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise RenderQueueFull(f"{self._pending} render jobs already pending")
+            self._pending += 1
+        self._write_state(key, status='queued', attempts=0, error=None)
+        self._dispatchers.submit(self._run, key, pdf_data, proposal_id)
+        return key
+
+    def _run(self, key, pdf_data, proposal_id):
+        error = None
+        try:
+            for attempt in range(1, self.retries + 2):
+                self._write_state(key, status='running', attempts=attempt, error=error)
+                pool = self._get_pool()
+                try:
+                    pdf = pool.submit(render_proposal_pdf, pdf_data).result(timeout=self.timeout)
+                except FutureTimeout:
+                    error = f"Rendering timed out after {self.timeout}s"
+                    self._reset_pool(pool)
+                except BrokenProcessPool:
+                    error = "Render worker exited unexpectedly"
+                    self._reset_pool(pool)
+                except Exception as e:
+                    error = str(e)
+                else:
+                    pdf_cache.put(key, pdf)
+                    if proposal_id:
+                        close_old_connections()
+                        pdf_cache.attach(proposal_id, key)
+                    self._write_state(key, status='done', attempts=attempt, error=None)
+                    with self._lock:
+                        self._completed += 1
+                    return
+                print(f"PDF render attempt {attempt} failed for {key[:12]}: {error}")
+                if attempt <= self.retries:
+                    with self._lock:
+                        self._retried += 1
+
+            self._write_state(key, status='failed', attempts=self.retries + 1, error=error)
+            with self._lock:
+                self._failed += 1
+        except Exception as e:
+            print(f"PDF render job error: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+            close_old_connections()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'completed': self._completed,
+                'failed': self._failed,
+                'retried': self._retried,
+            }
+
+
+# Create singleton instance
+render_queue = PDFRenderQueue()
@@ -0,0 +1,99 @@
+import statistics
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+
+from proposals.renderers import RENDERERS, ReportLabRenderer
+from proposals.rendering import ProposalTemplate
+
+SAMPLE_PROPOSAL = {
+    'proposal_id': 'BENCHMARK',
+    'name': 'Ada Okafor',
+    'email': 'ada@example.edu',
+    'institution': 'Benchmark International School',
+    'phone': '+234 800 000 0000',
+    'country': 'Nigeria',
+    'estimated_students': 1200,
+    'estimated_teachers': 80,
+    'deployment_fee': '₦5,000,000',
+    'needs_ctb': True,
+    'needs_live_classes': True,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare proposal PDF engines: render time, memory allocations and output size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engine', action='append', choices=sorted(RENDERERS),
+                            help='Engine to measure (repeatable; default: all)')
+        parser.add_argument('--iterations', type=int, default=20, help='Renders to time per engine')
+        parser.add_argument('--cold', action='store_true',
+                            help='Build a fresh renderer for every render, without cached resources')
+        parser.add_argument('--no-section-cache', action='store_true',
+                            help='ReportLab: lay out the whole document instead of stamping cached pages')
+        parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc accounting')
+
+    def _make_renderer(self, engine, options):
+        if engine == ReportLabRenderer.name:
+            use_cache = False if options['no_section_cache'] else None
+            # A fresh template each time so cold runs rebuild styles and images
+            return ReportLabRenderer(ProposalTemplate(), use_section_cache=use_cache)
+        return RENDERERS[engine]()
+
+    def handle(self, *args, **options):
+        iterations = max(1, options['iterations'])
+        engines = options['engine'] or sorted(RENDERERS)
+        results = []
+        for engine in engines:
+            try:
+                results.append(self._benchmark(engine, iterations, options))
+            except (ImportError, OSError) as e:
+                # WeasyPrint without its system libraries, for instance
+                self.stderr.write(self.style.WARNING(f"{engine}: unavailable ({e})"))
+        if not results:
+            raise CommandError('No engine could be benchmarked')
+
+        self.stdout.write('')
+        self.stdout.write(f"{'engine':<12}{'setup ms':>10}{'mean ms':>10}{'median ms':>11}"
+                          f"{'max ms':>9}{'peak KB':>9}{'size KB':>9}")
+        for row in results:
+            self.stdout.write(
+                f"{row['engine']:<12}{row['setup']:>10.1f}{row['mean']:>10.1f}{row['median']:>11.1f}"
+                f"{row['max']:>9.1f}{row['peak']:>9}{row['size']:>9.1f}"
+            )
+
+    def _benchmark(self, engine, iterations, options):
+        cold = options['cold']
+        trace = not options['no_memory']
+
+        started = time.perf_counter()
+        renderer = self._make_renderer(engine, options)
+        # The first render also fills per-process caches
+        renderer.render(SAMPLE_PROPOSAL)
+        setup = (time.perf_counter() - started) * 1000
+
+        timings, peaks = [], []
+        size = 0
+        for _ in range(iterations):
+            if trace:
+                tracemalloc.start()
+            started = time.perf_counter()
+            if cold:
+                renderer = self._make_renderer(engine, options)
+            pdf = renderer.render(SAMPLE_PROPOSAL)
+            timings.append((time.perf_counter() - started) * 1000)
+            if trace:
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            size = len(pdf)
+
+        return {
+            'engine': engine + (' (cold)' if cold else ''),
+            'setup': setup,
+            'mean': statistics.mean(timings),
+            'median': statistics.median(timings),
+            'max': max(timings),
+            'peak': f"{statistics.mean(peaks) / 1024:.0f}" if peaks else '-',
+            'size': size / 1024,
+        }
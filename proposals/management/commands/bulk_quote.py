@@ -0,0 +1,47 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+
+from proposals.bulk import BulkQuoteError, parse_rows, quote_rows, iter_csv
+
+
+class Command(BaseCommand):
+    help = 'Quote deployment fees for a CSV or JSON list of institutions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="CSV or JSON file, or '-' for stdin")
+        parser.add_argument('--output', help='Write the quote CSV here instead of stdout')
+        parser.add_argument('--create', action='store_true', help='Store a ProposalRequest for every valid row')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows priced and saved per batch')
+
+    def handle(self, *args, **options):
+        try:
+            if options['input'] == '-':
+                content = sys.stdin.read()
+            else:
+                with open(options['input'], 'rb') as f:
+                    content = f.read()
+            rows = parse_rows(content, 'json' if options['input'].endswith('.json') else '')
+        except (OSError, BulkQuoteError) as e:
+            raise CommandError(str(e))
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for result_line in iter_csv(self._track_errors(quote_rows(
+                rows, create=options['create'], batch_size=options['batch_size']
+            ))):
+                output.write(result_line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        summary = f"Quoted {len(rows) - self.errors} of {len(rows)} rows"
+        if options['create']:
+            summary += ' and stored them as proposals'
+        self.stderr.write(self.style.SUCCESS(summary))
+
+    def _track_errors(self, results):
+        self.errors = 0
+        for result in results:
+            if result['error']:
+                self.errors += 1
+            yield result
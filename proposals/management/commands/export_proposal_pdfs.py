@@ -0,0 +1,84 @@
+import json
+import os
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+
+from proposals.archive import render_proposals, iter_zip
+from proposals.models import ProposalRequest
+
+
+class Command(BaseCommand):
+    help = 'Render proposal PDFs in parallel into a ZIP archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='ZIP file to write')
+        parser.add_argument('--since', help='Only proposals created on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Only proposals created before this date (YYYY-MM-DD)')
+        parser.add_argument('--status', action='append', help='Only proposals with this status (repeatable)')
+        parser.add_argument('--ids', nargs='+', help='Only these proposal ids')
+        parser.add_argument('--workers', type=int, default=None, help='Render worker processes')
+        parser.add_argument('--reuse-existing', action='store_true',
+                            help="Use each proposal's current PDF where it has one")
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip proposals finished by an interrupted run with the same output')
+
+    def _date(self, value, option):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            raise CommandError(f"--{option} must be YYYY-MM-DD, got {value!r}")
+
+    def handle(self, *args, **options):
+        queryset = ProposalRequest.objects.order_by('created_at')
+        if options['since']:
+            queryset = queryset.filter(created_at__gte=self._date(options['since'], 'since'))
+        if options['until']:
+            queryset = queryset.filter(created_at__lt=self._date(options['until'], 'until'))
+        if options['status']:
+            queryset = queryset.filter(status__in=[s.upper() for s in options['status']])
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+        proposals = list(queryset)
+        if not proposals:
+            raise CommandError('No proposals match')
+
+        output = options['output']
+        # Finished entries are logged here so an interrupted run can resume
+        progress_path = f"{output}.progress"
+        reuse = {}
+        if options['reuse_existing']:
+            reuse = {str(p.pk): p.proposal_pdf.name for p in proposals if p.proposal_pdf}
+        if options['resume'] and os.path.exists(progress_path):
+            with open(progress_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line
+                    reuse[entry['id']] = entry['name']
+            self.stderr.write(f"Resuming: {len(reuse)} PDFs already done")
+
+        total = len(proposals)
+        count = 0
+        with open(progress_path, 'a' if options['resume'] else 'w') as progress:
+            def on_entry(proposal, name):
+                nonlocal count
+                count += 1
+                progress.write(json.dumps({'id': str(proposal.pk), 'name': name}) + "\n")
+                progress.flush()
+                if count % 25 == 0 or count == total:
+                    self.stderr.write(f"  {count}/{total} PDFs")
+
+            part_path = f"{output}.part"
+            with open(part_path, 'wb') as f:
+                for chunk in iter_zip(render_proposals(proposals, options['workers'], reuse), on_entry):
+                    f.write(chunk)
+            os.replace(part_path, output)
+
+        failed = total - count
+        if not failed:
+            os.remove(progress_path)
+        summary = f"Wrote {count} of {total} proposal PDFs to {output}"
+        if failed:
+            summary += f" ({failed} failed, see errors.txt in the archive)"
+        self.stderr.write(self.style.SUCCESS(summary) if not failed else self.style.WARNING(summary))
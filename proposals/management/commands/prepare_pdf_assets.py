@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from proposals.pdf_assets import PDF_ASSETS, prepare_assets
+
+
+class Command(BaseCommand):
+    help = 'Downscale and recompress the images embedded in proposal PDFs (run with collectstatic)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dpi', type=int, default=None, help='Resolution at the printed size')
+        parser.add_argument('--quality', type=int, default=None, help='JPEG quality for opaque images')
+        parser.add_argument('--force', action='store_true', help='Prepare again even if up to date')
+
+    def handle(self, *args, **options):
+        prepared = prepare_assets(dpi=options['dpi'], quality=options['quality'], force=options['force'])
+        for name, path in prepared.items():
+            self.stdout.write(f"{name}: {path}")
+        missing = set(PDF_ASSETS) - set(prepared)
+        if missing:
+            raise CommandError(f"Could not prepare: {', '.join(sorted(missing))}")
+        self.stderr.write(self.style.SUCCESS(f"Prepared {len(prepared)} proposal PDF assets"))
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRegion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.SlugField(unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('currency', models.CharField(max_length=3)),
+                ('currency_symbol', models.CharField(max_length=5)),
+                ('base_fee', models.PositiveIntegerField(help_text="Whole units of the region's currency")),
+                ('range_label', models.CharField(blank=True, max_length=100)),
+                ('countries', models.JSONField(blank=True, default=list, help_text='Country names, matched case-insensitively')),
+                ('is_default', models.BooleanField(default=False, help_text='Used for countries no region lists')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule_type', models.CharField(choices=[('MODULES', 'Module add-on'), ('STUDENTS', 'Student band')], max_length=10)),
+                ('modules', models.CharField(blank=True, choices=[('ctb', 'CBT only'), ('live', 'Live classes only'), ('both', 'CBT and live classes')], max_length=10)),
+                ('min_students', models.PositiveIntegerField(default=0, help_text='Student bands apply above this many students')),
+                ('amount', models.PositiveIntegerField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rules', to='proposals.pricingregion')),
+            ],
+            options={
+                'ordering': ['region', 'rule_type', 'min_students'],
+            },
+        ),
+    ]
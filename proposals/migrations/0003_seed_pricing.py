@@ -0,0 +1,65 @@
+from django.db import migrations
+
+REGIONS = [
+    {
+        'code': 'africa',
+        'name': 'Africa',
+        'currency': 'NGN',
+        'currency_symbol': '₦',
+        'base_fee': 5000000,
+        'range_label': '₦5,000,000 - ₦10,000,000',
+        'countries': ['africa', 'nigeria', 'ghana', 'kenya', 'south africa', 'tanzania', 'uganda'],
+        'is_default': False,
+        'rules': [
+            ('MODULES', 'both', 0, 2000000),
+            ('MODULES', 'live', 0, 1500000),
+            ('STUDENTS', '', 200, 500000),
+            ('STUDENTS', '', 500, 1000000),
+            ('STUDENTS', '', 1000, 2000000),
+        ],
+    },
+    {
+        'code': 'international',
+        'name': 'International',
+        'currency': 'USD',
+        'currency_symbol': '$',
+        'base_fee': 10000,
+        'range_label': '$10,000 - $15,000',
+        'countries': [],
+        'is_default': True,
+        'rules': [
+            ('MODULES', 'both', 0, 3000),
+            ('MODULES', 'live', 0, 2000),
+        ],
+    },
+]
+
+
+def seed_pricing(apps, schema_editor):
+    PricingRegion = apps.get_model('proposals', 'PricingRegion')
+    PricingRule = apps.get_model('proposals', 'PricingRule')
+    for data in REGIONS:
+        data = dict(data)
+        rules = data.pop('rules')
+        region = PricingRegion.objects.create(**data)
+        PricingRule.objects.bulk_create([
+            PricingRule(region=region, rule_type=rule_type, modules=modules,
+                        min_students=min_students, amount=amount)
+            for rule_type, modules, min_students, amount in rules
+        ])
+
+
+def unseed_pricing(apps, schema_editor):
+    PricingRegion = apps.get_model('proposals', 'PricingRegion')
+    PricingRegion.objects.filter(code__in=[region['code'] for region in REGIONS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0002_pricing'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_pricing, unseed_pricing),
+    ]
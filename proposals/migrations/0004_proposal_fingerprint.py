@@ -0,0 +1,22 @@
+# Generated by Django 4.2.28 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0003_seed_pricing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proposalrequest',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='proposalrequest',
+            index=models.Index(fields=['fingerprint', 'updated_at'], name='proposal_dedup_idx'),
+        ),
+    ]
@@ -38,6 +38,15 @@ class ProposalRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Hash of the normalized requester, institution, country, modules and
+    # student band; repeat requests within the dedup window reuse the row
+    fingerprint = models.CharField(max_length=64, blank=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['fingerprint', 'updated_at'], name='proposal_dedup_idx'),
+        ]
+    
     def __str__(self):
         return f"Proposal for {self.institution} by {self.name}"
     
@@ -67,4 +76,48 @@ class ProposalRequest(models.Model):
             'currency': self.currency,
             'deployment_fee': self.deployment_fee,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class PricingRegion(models.Model):
+    """A pricing region: currency, base fee and the countries it covers"""
+    code = models.SlugField(max_length=50, unique=True)
+    name = models.CharField(max_length=100)
+    currency = models.CharField(max_length=3)
+    currency_symbol = models.CharField(max_length=5)
+    base_fee = models.PositiveIntegerField(help_text="Whole units of the region's currency")
+    range_label = models.CharField(max_length=100, blank=True)
+    countries = models.JSONField(default=list, blank=True, help_text="Country names, matched case-insensitively")
+    is_default = models.BooleanField(default=False, help_text="Used for countries no region lists")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.currency})"
+
+
+class PricingRule(models.Model):
+    """A fee added on top of a region's base fee"""
+    RULE_TYPES = [
+        ('MODULES', 'Module add-on'),
+        ('STUDENTS', 'Student band'),
+    ]
+    MODULE_CHOICES = [
+        ('ctb', 'CBT only'),
+        ('live', 'Live classes only'),
+        ('both', 'CBT and live classes'),
+    ]
+    
+    region = models.ForeignKey(PricingRegion, on_delete=models.CASCADE, related_name='rules')
+    rule_type = models.CharField(max_length=10, choices=RULE_TYPES)
+    modules = models.CharField(max_length=10, choices=MODULE_CHOICES, blank=True)
+    min_students = models.PositiveIntegerField(default=0, help_text="Student bands apply above this many students")
+    amount = models.PositiveIntegerField()
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['region', 'rule_type', 'min_students']
+    
+    def __str__(self):
+        if self.rule_type == 'MODULES':
+            return f"{self.region.code}: {self.get_modules_display()} +{self.amount:,}"
+        return f"{self.region.code}: >{self.min_students} students +{self.amount:,}"
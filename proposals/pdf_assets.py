@@ -0,0 +1,122 @@
+"""
+Print-ready images for proposal PDFs
+
+The letterhead logo and the signature are downscaled to the size they are
+placed at (at PROPOSAL_PDF_IMAGE_DPI) and recompressed once, into
+PDF_ASSET_DIR. Opaque images become JPEGs, which PDF engines embed as they
+are instead of re-encoding pixels on every render; images with real
+transparency stay PNG so their alpha channel survives. Prepared files
+are named by a hash of the source and settings, so a changed logo or DPI
+prepares new files and stale ones are removed.
+
+Run `python manage.py prepare_pdf_assets` at deploy time (next to
+collectstatic); otherwise assets are prepared when a renderer first loads.
+"""
+import hashlib
+import os
+import threading
+from django.conf import settings
+
+from PIL import Image
+
+LOGO_PATH = 'static/images/logo/paperlogo.png'
+SIGNATURE_PATH = 'static/images/signature.png'
+
+# Name -> (source relative to BASE_DIR, placed width and height in points)
+PDF_ASSETS = {
+    'logo': (LOGO_PATH, 180, 150),
+    'signature': (SIGNATURE_PATH, 120, 40),
+}
+
+# Bump when the preparation steps change
+ASSET_VERSION = 1
+
+# Pixels at least this opaque count as opaque
+OPAQUE_ALPHA = 250
+
+_lock = threading.Lock()
+
+
+def _image_dpi(dpi=None):
+    return dpi or getattr(settings, 'PROPOSAL_PDF_IMAGE_DPI', 150)
+
+
+def prepare_image(source, width, height, dpi=None):
+    """Return (image, format) downscaled to width x height points at dpi"""
+    dpi = _image_dpi(dpi)
+    with Image.open(source) as original:
+        image = original.copy()
+    # Never upscale: each side is capped at the source's own resolution
+    target = (
+        min(image.width, max(1, round(width / 72 * dpi))),
+        min(image.height, max(1, round(height / 72 * dpi))),
+    )
+    if target != image.size:
+        image = image.resize(target, Image.LANCZOS)
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        if image.getchannel('A').getextrema()[0] < OPAQUE_ALPHA:
+            return image, 'PNG'
+        # Alpha that is never meaningfully used: flatten onto the white page
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    return image, 'JPEG'
+
+
+def prepare_assets(base_dir=None, output_dir=None, dpi=None, quality=None, force=False):
+    """Prepare every PDF asset and return {name: path}; missing sources are skipped"""
+    base_dir = str(base_dir or settings.BASE_DIR)
+    output_dir = str(output_dir or getattr(settings, 'PDF_ASSET_DIR', os.path.join(base_dir, 'cache', 'pdf_assets')))
+    dpi = _image_dpi(dpi)
+    quality = quality or getattr(settings, 'PROPOSAL_PDF_JPEG_QUALITY', 85)
+
+    prepared = {}
+    with _lock:
+        for name, (relative_path, width, height) in PDF_ASSETS.items():
+            source = os.path.join(base_dir, relative_path)
+            try:
+                with open(source, 'rb') as f:
+                    digest = hashlib.sha256(f.read())
+            except OSError as e:
+                print(f"⚠️ PDF asset {name} not found at {source}: {e}")
+                continue
+            digest.update(f"{ASSET_VERSION}:{dpi}:{quality}:{width}x{height}".encode())
+            stem = f"{name}-{digest.hexdigest()[:12]}"
+
+            existing = [
+                entry for entry in (os.listdir(output_dir) if os.path.isdir(output_dir) else [])
+                if entry.startswith(f"{name}-") and not entry.endswith('.tmp')
+            ]
+            current = [entry for entry in existing if entry.rsplit('.', 1)[0] == stem]
+            if current and not force:
+                prepared[name] = os.path.join(output_dir, current[0])
+                continue
+
+            try:
+                image, image_format = prepare_image(source, width, height, dpi)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not prepare PDF asset {name} from {source}: {e}")
+                continue
+            path = os.path.join(output_dir, f"{stem}.{'png' if image_format == 'PNG' else 'jpg'}")
+            os.makedirs(output_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            if image_format == 'PNG':
+                image.save(tmp_path, 'PNG', optimize=True)
+            else:
+                image.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+            os.replace(tmp_path, path)
+            for entry in existing:
+                if os.path.join(output_dir, entry) != path:
+                    # Another worker process may have removed it already
+                    try:
+                        os.remove(os.path.join(output_dir, entry))
+                    except FileNotFoundError:
+                        pass
+            print(f"✅ Prepared PDF asset {name}: {image.width}x{image.height} "
+                  f"{image_format} ({os.path.getsize(path) / 1024:.1f} KB)")
+            prepared[name] = path
+    return prepared
@@ -0,0 +1,190 @@
+"""
+Content-addressed cache of rendered proposal PDFs
+
+A PDF is keyed by a hash of its normalized input data, the template
+version, the rendering engine and the issue date printed on it, so
+identical requests on the same day reuse one file and any change to the
+data or template renders a fresh one. Files live under MEDIA_ROOT so they can also back
+ProposalRequest.proposal_pdf.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+from django.conf import settings
+
+from api.singleflight import SingleFlight
+
+# Bump whenever the proposal layout or wording changes
+TEMPLATE_VERSION = 4
+
+TEXT_FIELDS = [
+    'proposal_id', 'name', 'email', 'institution', 'phone', 'country',
+    'preferred_colors', 'deployment_fee',
+]
+BOOL_FIELDS = ['needs_ctb', 'needs_live_classes', 'has_logo']
+INT_FIELDS = ['estimated_students', 'estimated_teachers']
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def _as_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def normalize_pdf_data(pdf_data):
+    """Canonical form of the fields the PDF template reads"""
+    normalized = {field: str(pdf_data.get(field) or '').strip() for field in TEXT_FIELDS}
+    normalized.update({field: _as_bool(pdf_data.get(field)) for field in BOOL_FIELDS})
+    normalized.update({field: _as_int(pdf_data.get(field)) for field in INT_FIELDS})
+    return normalized
+
+
+def cache_key(pdf_data, issue_date=None, engine=None):
+    payload = json.dumps({
+        'version': TEMPLATE_VERSION,
+        'engine': engine or getattr(settings, 'PROPOSAL_PDF_ENGINE', 'reportlab'),
+        'date': (issue_date or date.today()).isoformat(),
+        'data': normalize_pdf_data(pdf_data),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ProposalPDFCache:
+    """Rendered PDFs on disk, one file per cache key"""
+
+    SUBDIR = 'proposals/rendered'
+
+    def __init__(self, root=None, max_age_days=None):
+        self.root = str(root or settings.MEDIA_ROOT)
+        self.max_age_days = max_age_days or getattr(settings, 'PROPOSAL_PDF_CACHE_DAYS', 7)
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self._hits = 0
+        self._renders = 0
+
+    def name_for(self, key):
+        """Storage name relative to MEDIA_ROOT, as kept in FileFields"""
+        return f"{self.SUBDIR}/{key}.pdf"
+
+    def path_for(self, key):
+        return os.path.join(self.root, self.name_for(key))
+
+    def get(self, key):
+        path = self.path_for(key)
+        return path if os.path.exists(path) else None
+
+    def put(self, key, pdf):
+        return self.write(key, lambda f: f.write(pdf))
+
+    def write(self, key, write):
+        """Store the PDF that write(file) writes into an open file, and return its path
+
+        The file only appears under its key once write() has returned.
+        """
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._maybe_purge()
+        return path
+
+    def get_or_render(self, pdf_data, render):
+        """Return (key, path, rendered) for pdf_data, calling render(pdf_data, output) on a miss
+
+        render writes the PDF straight into the cache file, so a miss never
+        holds the document in memory. Concurrent requests for the same key
+        in this process share one render.
+        """
+        key = cache_key(pdf_data)
+        path = self.get(key)
+        if path is not None:
+            with self._lock:
+                self._hits += 1
+            return key, path, False
+
+        def render_and_store():
+            existing = self.get(key)
+            if existing is not None:
+                return existing, False
+            path = self.write(key, lambda f: render(pdf_data, f))
+            with self._lock:
+                self._renders += 1
+            return path, True
+
+        path, rendered = self._flights.do(key, render_and_store)
+        return key, path, rendered
+
+    def attach(self, proposal_id, key):
+        """Point ProposalRequest.proposal_pdf at the cached file
+
+        Only a PDF rendered from the proposal's own stored data is attached:
+        request bodies are client-supplied, so a key that does not match the
+        row is ignored. The row's status and updated_at are left alone.
+        """
+        from .models import ProposalRequest
+        name = self.name_for(key)
+        try:
+            proposal = ProposalRequest.objects.filter(pk=proposal_id).first()
+        except Exception:
+            # Temporary ids are not UUIDs
+            return
+        if proposal is None or proposal.proposal_pdf.name == name:
+            return
+        if cache_key(proposal.get_proposal_data()) != key:
+            print(f"⚠️ Not attaching PDF {key[:12]} to proposal {proposal_id}: data differs from the stored proposal")
+            return
+        ProposalRequest.objects.filter(pk=proposal.pk).update(proposal_pdf=name)
+
+    def _maybe_purge(self):
+        """Drop PDFs and job state files past max_age_days that no proposal references"""
+        now = time.time()
+        with self._lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + 3600
+        from .models import ProposalRequest
+
+        directory = os.path.join(self.root, self.SUBDIR)
+        cutoff = now - self.max_age_days * 86400
+        try:
+            stale = {
+                f"{self.SUBDIR}/{entry.name}": entry.path
+                for entry in os.scandir(directory)
+                if entry.name.endswith(('.pdf', '.json')) and entry.stat().st_mtime < cutoff
+            }
+            if not stale:
+                return
+            kept = set(ProposalRequest.objects.filter(
+                proposal_pdf__in=list(stale)
+            ).values_list('proposal_pdf', flat=True))
+            for name, path in stale.items():
+                if name not in kept:
+                    os.remove(path)
+        except Exception as e:
+            print(f"PDF cache purge error: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self._hits, 'renders': self._renders}
+
+
+# Create singleton instance
+pdf_cache = ProposalPDFCache()
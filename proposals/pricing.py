@@ -0,0 +1,217 @@
+"""
+Deployment fee pricing engine
+
+PricingRegion and PricingRule rows are compiled into plain in-memory
+structures: a country -> region dict, a module add-on dict per region,
+and sorted student-band thresholds searched with bisect. Quotes are
+memoized per (region, modules, band). Saving a rule reloads the current
+worker at once; other workers notice within PRICING_CHECK_SECONDS.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+from django.conf import settings
+from django.db.models import Count, Max
+
+CompiledRegion = namedtuple('CompiledRegion', [
+    'code', 'name', 'currency', 'currency_symbol', 'base_fee', 'range_label',
+    'module_fees', 'band_thresholds', 'band_fees',
+])
+
+# Used until the pricing tables exist, e.g. before migrations have run
+FALLBACK_REGIONS = [
+    CompiledRegion(
+        'africa', 'Africa', 'NGN', '₦', 5000000, '₦5,000,000 - ₦10,000,000',
+        {'both': 2000000, 'live': 1500000}, [200, 500, 1000], [500000, 1000000, 2000000],
+    ),
+    CompiledRegion(
+        'international', 'International', 'USD', '$', 10000, '$10,000 - $15,000',
+        {'both': 3000, 'live': 2000}, [], [],
+    ),
+]
+FALLBACK_COUNTRIES = {
+    country: 'africa'
+    for country in ['africa', 'nigeria', 'ghana', 'kenya', 'south africa', 'tanzania', 'uganda']
+}
+
+
+def normalize_country(country):
+    return (country or '').strip().lower()
+
+
+def module_key(needs_ctb, needs_live_classes):
+    if needs_live_classes:
+        return 'both' if needs_ctb else 'live'
+    return 'ctb'
+
+
+class PricingEngine:
+    """Compiled pricing rules with memoized quotes"""
+
+    def __init__(self, check_seconds=None):
+        self.check_seconds = check_seconds if check_seconds is not None else getattr(
+            settings, 'PRICING_CHECK_SECONDS', 30
+        )
+        self._lock = threading.Lock()
+        self._regions = {}
+        self._countries = {}
+        self._default = None
+        self._version = None
+        self._checked_at = None
+        self._quote = lru_cache(maxsize=1024)(self._compute_quote)
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _db_version():
+        from .models import PricingRegion, PricingRule
+        regions = PricingRegion.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+        rules = PricingRule.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+        return (regions['count'], regions['updated'], rules['count'], rules['updated'])
+
+    @staticmethod
+    def _compile_from_db():
+        from .models import PricingRegion
+
+        regions, countries = [], {}
+        for region in PricingRegion.objects.prefetch_related('rules'):
+            module_fees, bands = {}, []
+            for rule in region.rules.all():
+                if not rule.is_active:
+                    continue
+                if rule.rule_type == 'MODULES':
+                    module_fees[rule.modules] = rule.amount
+                else:
+                    bands.append((rule.min_students, rule.amount))
+            bands.sort()
+            regions.append(CompiledRegion(
+                region.code, region.name, region.currency, region.currency_symbol,
+                region.base_fee, region.range_label, module_fees,
+                [threshold for threshold, _ in bands], [amount for _, amount in bands],
+            ))
+            for country in region.countries or []:
+                countries[normalize_country(country)] = region.code
+            if region.is_default:
+                countries[None] = region.code
+        return regions, countries
+
+    def _install(self, regions, countries):
+        by_code = {region.code: region for region in regions}
+        default = by_code.get(countries.pop(None, None))
+        if default is None and regions:
+            default = regions[-1]
+        self._regions, self._countries, self._default = by_code, countries, default
+        self._quote.cache_clear()
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+                return
+            self._checked_at = now
+            try:
+                version = self._db_version()
+                if version == self._version:
+                    return
+                regions, countries = self._compile_from_db()
+                if not regions:
+                    raise ValueError("no pricing regions configured")
+            except Exception as e:
+                if self._version is None and not self._regions:
+                    print(f"Pricing rules unavailable, using built-in defaults: {e}")
+                    countries = dict(FALLBACK_COUNTRIES)
+                    countries[None] = 'international'
+                    self._install(FALLBACK_REGIONS, countries)
+                return
+            self._install(regions, countries)
+            self._version = version
+
+    def reload(self):
+        """Recompile on the next quote, e.g. after a rule is saved"""
+        with self._lock:
+            self._checked_at = None
+            self._version = None
+
+    # ------------------------------------------------------------------
+    # Quotes
+    # ------------------------------------------------------------------
+
+    def region_for(self, country):
+        self._ensure_current()
+        code = self._countries.get(normalize_country(country))
+        return self._regions.get(code, self._default)
+
+    def currency_for(self, country):
+        return self.region_for(country).currency
+
+    def _compute_quote(self, region_code, modules, band):
+        region = self._regions[region_code]
+        fee = region.base_fee + region.module_fees.get(modules, 0)
+        if band >= 0:
+            fee += region.band_fees[band]
+        return {
+            'amount': f"{region.currency_symbol}{fee:,.0f}",
+            'currency': region.currency,
+            'currency_symbol': region.currency_symbol,
+            'range': region.range_label,
+            'note': 'One-time deployment fee',
+            'region': region.name,
+            'value': fee,
+        }
+
+    @staticmethod
+    def _band(region, estimated_students):
+        try:
+            students = int(estimated_students or 0)
+        except (TypeError, ValueError):
+            students = 0
+        # Band i applies to student counts strictly above threshold i
+        return bisect_left(region.band_thresholds, students) - 1
+
+    def student_band(self, country, estimated_students):
+        """Index of the student band priced for country (-1 below the first threshold)"""
+        return self._band(self.region_for(country), estimated_students)
+
+    def quote(self, country, needs_ctb=True, needs_live_classes=False, estimated_students=100):
+        """Deployment fee quote; callers get their own copy of the memoized dict"""
+        region = self.region_for(country)
+        band = self._band(region, estimated_students)
+        return dict(self._quote(region.code, module_key(needs_ctb, needs_live_classes), band))
+
+    def quote_many(self, requests):
+        """Quote (country, needs_ctb, needs_live_classes, students) tuples in one pass
+
+        Rules are checked once for the whole batch and each distinct country
+        is resolved once. The returned dicts are shared and must not be
+        modified.
+        """
+        self._ensure_current()
+        regions = {}
+        quotes = []
+        for country, needs_ctb, needs_live_classes, estimated_students in requests:
+            key = normalize_country(country)
+            region = regions.get(key)
+            if region is None:
+                region = regions[key] = self._regions.get(self._countries.get(key), self._default)
+            band = self._band(region, estimated_students)
+            quotes.append(self._quote(region.code, module_key(needs_ctb, needs_live_classes), band))
+        return quotes
+
+    def stats(self):
+        cache_info = self._quote.cache_info()
+        return {
+            'regions': sorted(self._regions),
+            'countries': len(self._countries),
+            'quote_cache_hits': cache_info.hits,
+            'quote_cache_misses': cache_info.misses,
+        }
+
+
+# Create singleton instance
+pricing_engine = PricingEngine()
@@ -0,0 +1,171 @@
+"""
+Proposal PDF rendering engines
+
+Every engine turns the same pdf_data dict into PDF bytes:
+
+- 'reportlab' (the default) lays out the flowables in proposals.rendering
+- 'weasyprint' renders templates/proposals/proposal_pdf.html with its CSS
+
+PROPOSAL_PDF_ENGINE picks the engine for a deployment. Engines are built
+once per process and keep their parsed resources between renders.
+"""
+import mimetypes
+import os
+import threading
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.template.loader import get_template as get_django_template
+
+from .pdf_assets import prepare_assets
+from .rendering import COMPANY_INFO, CBT_FEATURES, LIVE_FEATURES, SCOPE_ITEMS, get_template
+
+
+class ProposalRenderer:
+    """Base class for proposal PDF engines"""
+
+    name = None
+
+    def render(self, pdf_data, output=None):
+        """Return the proposal as PDF bytes, or write it to the binary file output"""
+        raise NotImplementedError
+
+
+class ReportLabRenderer(ProposalRenderer):
+    """Flowable layout with cached base pages (see proposals.rendering)"""
+
+    name = 'reportlab'
+
+    def __init__(self, template=None, use_section_cache=None):
+        self.template = template or get_template()
+        self.use_section_cache = use_section_cache
+
+    def render(self, pdf_data, output=None):
+        return self.template.render(pdf_data, use_cache=self.use_section_cache, output=output)
+
+
+class WeasyPrintRenderer(ProposalRenderer):
+    """HTML/CSS template rendered by WeasyPrint
+
+    The stylesheet is parsed once against a shared FontConfiguration, so
+    fonts are looked up and loaded once per process, and decoded images are
+    kept in an in-memory cache across renders. Fonts are embedded as
+    subsets and prepared images are written without re-encoding.
+    """
+
+    name = 'weasyprint'
+    TEMPLATE_NAME = 'proposals/proposal_pdf.html'
+    STYLESHEET_PATH = 'templates/proposals/proposal_pdf.css'
+    ASSET_SCHEME = 'proposal-asset:'
+
+    def __init__(self, base_dir=None, image_dpi=None):
+        # Imported here: WeasyPrint needs Pango and is only loaded when chosen
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+        from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+        base_dir = str(base_dir or settings.BASE_DIR)
+        self._html = HTML
+
+        # The same prepared images as the ReportLab engine, served from memory
+        self.assets = {}
+        for name, path in prepare_assets(base_dir, dpi=image_dpi).items():
+            with open(path, 'rb') as f:
+                self.assets[name] = (f.read(), mimetypes.guess_type(path)[0])
+
+        assets, scheme = self.assets, self.ASSET_SCHEME
+
+        class AssetFetcher(URLFetcher):
+            def fetch(self, url, headers=None):
+                if url.startswith(scheme):
+                    data, content_type = assets[url[len(scheme):]]
+                    return URLFetcherResponse(url, data, {'Content-Type': content_type})
+                return super().fetch(url, headers)
+
+        self.url_fetcher = AssetFetcher(allowed_protocols=['file', 'data'])
+        self.font_config = FontConfiguration()
+        with open(os.path.join(base_dir, self.STYLESHEET_PATH), encoding='utf-8') as f:
+            self.stylesheet = CSS(string=f.read(), font_config=self.font_config,
+                                  url_fetcher=self.url_fetcher)
+        self.template = get_django_template(self.TEMPLATE_NAME)
+        self.image_cache = {}
+        # Font configuration and image cache are not safe to share between threads
+        self._lock = threading.Lock()
+
+    def context(self, pdf_data):
+        current_date = datetime.now()
+        expiry_date = current_date + timedelta(days=30)
+        return {
+            'data': pdf_data,
+            'proposal_id': pdf_data.get('proposal_id', 'temp'),
+            'issue_date': current_date.strftime("%B %d, %Y"),
+            'expiry_date': expiry_date.strftime("%B %d, %Y"),
+            'company_info': COMPANY_INFO,
+            'cbt_features': [feature.lstrip('• ') for feature in CBT_FEATURES],
+            'live_features': [feature.lstrip('• ') for feature in LIVE_FEATURES],
+            'scope_items': [item.lstrip('• ') for item in SCOPE_ITEMS],
+            'logo_url': f"{self.ASSET_SCHEME}logo" if 'logo' in self.assets else None,
+            'signature_url': f"{self.ASSET_SCHEME}signature" if 'signature' in self.assets else None,
+        }
+
+    def render(self, pdf_data, output=None):
+        html = self.template.render(self.context(pdf_data))
+        with self._lock:
+            return self._html(string=html, url_fetcher=self.url_fetcher).write_pdf(
+                output,
+                stylesheets=[self.stylesheet],
+                font_config=self.font_config,
+                cache=self.image_cache,
+                # Subset fonts, keep streams compressed, embed images as prepared
+                full_fonts=False,
+                uncompressed_pdf=False,
+                optimize_images=False,
+            )
+
+
+RENDERERS = {
+    ReportLabRenderer.name: ReportLabRenderer,
+    WeasyPrintRenderer.name: WeasyPrintRenderer,
+}
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def engine_name(name=None):
+    """The requested engine name, or the configured default"""
+    name = name or getattr(settings, 'PROPOSAL_PDF_ENGINE', 'reportlab')
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown proposal PDF engine {name!r}; choose from {', '.join(RENDERERS)}")
+    return name
+
+
+def get_renderer(name=None):
+    """The process-wide renderer for an engine, built on first use"""
+    name = engine_name(name)
+    renderer = _renderers.get(name)
+    if renderer is None:
+        with _renderers_lock:
+            renderer = _renderers.get(name)
+            if renderer is None:
+                renderer = RENDERERS[name]()
+                _renderers[name] = renderer
+                print(f"✅ Proposal renderer loaded: {name}")
+    return renderer
+
+
+def render_proposal_pdf(pdf_data, output=None):
+    """Render the proposal document with the configured engine
+
+    Returns PDF bytes, or writes the PDF to the binary file output (and
+    returns None) so it is never copied in memory.
+    """
+    try:
+        pdf = get_renderer().render(pdf_data, output)
+    except Exception as pdf_error:
+        print(f"❌ PDF creation error: {str(pdf_error)}")
+        raise pdf_error
+
+    size = output.tell() if output is not None else len(pdf)
+    if size < 100:
+        raise ValueError(f"PDF too small ({size} bytes)")
+    return pdf
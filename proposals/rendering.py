@@ -0,0 +1,473 @@
+"""
+ReportLab rendering of proposal documents
+
+Kept free of request and ORM state so it can run in worker processes.
+Everything that does not depend on the proposal data (styles, decoded
+images, boilerplate paragraphs) lives on a ProposalTemplate that is built
+once per process. The module and scope sections depend only on which
+modules were chosen, so with pypdf installed the template also keeps the
+non-personalized pages pre-rendered per module combination and each
+render only lays out the recipient details, summary, fee and dates as an
+overlay. Images come print-sized from proposals.pdf_assets.
+"""
+import copy
+import io
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from django.conf import settings
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import (
+    SimpleDocTemplate, Frame, Paragraph, Spacer, Table, TableStyle, Image, PageBreak, CondPageBreak,
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib import colors
+from reportlab.lib.units import inch, mm
+from reportlab.platypus.flowables import Flowable, HRFlowable
+
+from .pdf_assets import prepare_assets
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+# Streams stay Flate-compressed; ASCII85 on top only makes them 25% larger
+rl_config.useA85 = 0
+
+PAGE_SIZE = A4
+PAGE_MARGINS = {
+    'rightMargin': 20*mm,
+    'leftMargin': 20*mm,
+    'topMargin': 25*mm,
+    'bottomMargin': 20*mm,
+}
+
+COMPANY_INFO = [
+    "House 26, T.O.S Benson Crescent, Utako, Abuja, Nigeria",
+    "Phone: +234 703 067 3089 | Email: info@javanetict.com",
+    "Website: www.javanetict.com"
+]
+
+CBT_FEATURES = [
+    "• Advanced question bank management system",
+    "• Automated grading and analytics dashboard",
+    "• Secure, Role-Based Authentication",
+    "• Multi-format question support"
+]
+
+LIVE_FEATURES = [
+    "• HD video conferencing with virtual whiteboard",
+    "• Intelligent Matching Engine",
+    "• Smart Attendance & Payroll",
+    "• Teacher Recruitment Suite"
+]
+
+SCOPE_ITEMS = [
+    "• Custom platform branding with institution's colors and logo",
+    "• Complete source code transfer and ownership rights",
+    "• Full installation and configuration on your servers",
+    "• Administrator and teacher training sessions",
+    "• One year of comprehensive technical support",
+    "• Lifetime system updates and security patches"
+]
+
+
+def load_image(path):
+    """ImageReader for a prepared asset, or None if there is none
+
+    JPEGs are embedded from the file as they are; other images are decoded
+    once here so every render shares the pixel data.
+    """
+    if path is None:
+        return None
+    try:
+        reader = ImageReader(path)
+        if reader.jpeg_fh() is None:
+            reader.getRGBData()
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not load image from {path}: {e}")
+        return None
+    return reader
+
+
+class PreparedImage(Image):
+    """Image flowable that draws an already decoded ImageReader"""
+
+    def __init__(self, reader, width, height, **kwargs):
+        self._img = reader
+        super().__init__(reader.fileName, width, height, **kwargs)
+
+
+class PositionMarker(Flowable):
+    """Zero-size flowable that records where on which page it was drawn"""
+
+    def __init__(self):
+        super().__init__()
+        self.page = self.x = self.y = self.width = None
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        return 0, 0
+
+    def draw(self):
+        self.page = self.canv.getPageNumber()
+        self.x, self.y = self.canv.absolutePosition(0, 0)
+
+
+# cover_top is where the cover text starts below the letterhead; footer_page
+# is 0-based and footer_x, footer_y and footer_width locate the footer table
+BasePages = namedtuple('BasePages', 'pdf cover_top footer_page footer_x footer_y footer_width')
+
+
+class ProposalTemplate:
+    """Styles, images and static flowables shared by every proposal render"""
+
+    def __init__(self, base_dir=None, image_dpi=None):
+        base_dir = str(base_dir or settings.BASE_DIR)
+        styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle(
+            'TitleStyle',
+            parent=styles['Heading1'],
+            fontSize=22,
+            textColor=colors.HexColor('#0d6efd'),
+            alignment=TA_CENTER,
+            spaceAfter=15,
+            fontName='Helvetica-Bold'
+        )
+        self.company_style = ParagraphStyle(
+            'CompanyStyle',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor=colors.HexColor('#666666'),
+            alignment=TA_CENTER,
+            spaceAfter=5
+        )
+        self.heading_style = ParagraphStyle(
+            'HeadingStyle',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#333333'),
+            spaceAfter=8,
+            fontName='Helvetica-Bold'
+        )
+        self.normal_style = ParagraphStyle(
+            'NormalStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#333333'),
+            spaceAfter=5,
+            fontName='Helvetica'
+        )
+        subtitle_style = ParagraphStyle('SubTitle', parent=styles['Normal'],
+                                        fontSize=12, alignment=TA_CENTER,
+                                        textColor=colors.HexColor('#666666'))
+        main_title_style = ParagraphStyle('MainTitle', parent=styles['Heading1'],
+                                          fontSize=16, alignment=TA_CENTER,
+                                          textColor=colors.HexColor('#0d6efd'),
+                                          spaceAfter=15, fontName='Helvetica-Bold')
+        feature_style = ParagraphStyle('Feature', parent=styles['Normal'],
+                                       fontSize=9, leftIndent=30)
+
+        def module_title_style(color):
+            return ParagraphStyle('ModuleTitle', parent=styles['Normal'],
+                                  fontSize=11, textColor=colors.HexColor(color),
+                                  leftIndent=15, fontName='Helvetica-Bold')
+
+        # Images, scaled to their printed size and loaded once
+        assets = prepare_assets(base_dir, dpi=image_dpi)
+        self.logo = load_image(assets.get('logo'))
+        self.signature = load_image(assets.get('signature'))
+
+        # 1. Letterhead
+        if self.logo is not None:
+            logo_image = PreparedImage(self.logo, width=180, height=150)
+            self.letterhead = [logo_image, Spacer(1, 2)]
+        else:
+            print("Using text fallback for the letterhead logo...")
+            self.letterhead = [Paragraph("JAVANET ICT SOLUTIONS", self.title_style)]
+        self.letterhead.append(Paragraph("", subtitle_style))
+        self.letterhead += [Paragraph(line, self.company_style) for line in COMPANY_INFO]
+        self.letterhead += [
+            Spacer(1, 10),
+            HRFlowable(width="100%", thickness=1,
+                       color=colors.HexColor('#0d6efd'),
+                       spaceBefore=5, spaceAfter=15),
+        ]
+
+        if self.signature is not None:
+            self.signature_image = PreparedImage(self.signature, width=120, height=40)
+        else:
+            self.signature_image = None
+
+        self.recipient_heading = [Paragraph("TO:", self.heading_style)]
+
+        # 4. Main title and the headings between dynamic sections
+        self.main_title = [
+            Paragraph("CUSTOM E-LEARNING PLATFORM DEPLOYMENT PROPOSAL", main_title_style),
+            HRFlowable(width="60%", thickness=2,
+                       color=colors.HexColor('#0d6efd'),
+                       spaceBefore=5, spaceAfter=20),
+            Paragraph("1. EXECUTIVE SUMMARY", self.heading_style),
+        ]
+        self.fee_heading = [Paragraph("2. ONE-TIME DEPLOYMENT FEE", self.heading_style)]
+        self.modules_heading = [Paragraph("3. PLATFORM MODULES INCLUDED", self.heading_style)]
+
+        # 7. Module blocks
+        self.cbt_module = [Paragraph("✓ Computer-Based Testing (CBT) System", module_title_style('#0d6efd'))]
+        self.cbt_module += [Paragraph(feature, feature_style) for feature in CBT_FEATURES]
+        self.cbt_module.append(Spacer(1, 12))
+        self.live_module = [Paragraph("✓ Live Interactive Classroom", module_title_style('#198754'))]
+        self.live_module += [Paragraph(feature, feature_style) for feature in LIVE_FEATURES]
+        self.live_module.append(Spacer(1, 25))
+
+        # 8. Scope of work
+        self.scope = [Paragraph("4. SCOPE OF DEPLOYMENT", self.heading_style)]
+        self.scope += [Paragraph(item, self.normal_style) for item in SCOPE_ITEMS]
+        self.scope.append(Spacer(1, 35))
+
+        self.header_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#0d6efd')),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.footer_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#666666')),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ])
+        # The footer's height does not depend on its dates
+        self.footer_height = self.footer_table('', '', self._signature_cell()).wrap(*PAGE_SIZE)[1]
+
+        self._base_pages = {}
+        self._base_pages_lock = threading.Lock()
+
+    @staticmethod
+    def _copy(flowables):
+        # Layout stores per-document state on flowables; parsed text is shared
+        return [copy.copy(flowable) for flowable in flowables]
+
+    def _build(self, story, output=None):
+        buffer = output if output is not None else io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=PAGE_SIZE, **PAGE_MARGINS)
+        doc.build(story)
+        return None if output is not None else buffer.getvalue()
+
+    def cover_story(self, data, current_date, expiry_date):
+        """Personalized part of the first page: dates, recipient, summary and fee"""
+        # 2. Proposal header
+        proposal_id = data.get('proposal_id', 'temp')
+
+        header_data = [
+            ["PROPOSAL ID", f"#{proposal_id}"],
+            ["DATE", current_date.strftime("%B %d, %Y")],
+            ["VALID UNTIL", expiry_date.strftime("%B %d, %Y")]
+        ]
+        header_table = Table(header_data, colWidths=[2*inch, 3*inch])
+        header_table.setStyle(self.header_table_style)
+        story = [header_table, Spacer(1, 25)]
+
+        # 3. Recipient info
+        story += self._copy(self.recipient_heading)
+        recipient_info = f"""
+        <b>{data.get('name', '')}</b><br/>
+        {data.get('institution', '')}<br/>
+        {data.get('country', '')}<br/>
+        Email: {data.get('email', '')}<br/>
+        Phone: {data.get('phone', 'Not provided')}
+        """
+        story.append(Paragraph(recipient_info, self.normal_style))
+        story.append(Spacer(1, 25))
+
+        # 4-5. Main title and executive summary
+        story += self._copy(self.main_title)
+        summary_text = f"""
+        This formal proposal outlines the comprehensive one-time deployment package for a
+        customized e-learning platform tailored specifically for <b>{data.get('institution', '')}</b>
+        located in <b>{data.get('country', '')}</b>. The proposed solution is designed to
+        support approximately <b>{data.get('estimated_students', 0)}</b> students and
+        <b>{data.get('estimated_teachers', 0)}</b> teachers.
+        """
+        story.append(Paragraph(summary_text, self.normal_style))
+        story.append(Spacer(1, 25))
+
+        # 6. Deployment fee
+        story += self._copy(self.fee_heading)
+        fee_amount = data.get('deployment_fee', 'N/A')
+        story.append(Paragraph(f"""
+        <para alignment="center">
+        <font size="20" color="#198754"><b>{fee_amount}</b></font><br/>
+        <font size="9" color="#666666">No Monthly Fees • Complete Ownership • Source Code Included</font>
+        </para>
+        """, self.normal_style))
+        return story
+
+    def section_story(self, needs_ctb, needs_live):
+        """Module and scope sections, which depend only on the modules chosen"""
+        # 7. Modules included
+        story = self._copy(self.modules_heading)
+        if needs_ctb:
+            story += self._copy(self.cbt_module)
+        if needs_live:
+            story += self._copy(self.live_module)
+
+        # 8. Scope of work
+        story += self._copy(self.scope)
+        return story
+
+    def footer_table(self, issue_text, expiry_text, signature_cell, labels=True):
+        """Validity dates and signature block closing the proposal
+
+        With labels=False only the dates are drawn, in the same geometry.
+        """
+        footer_data = [
+            ["JAVANET ICT SOLUTIONS", "PROPOSAL VALID FOR 30 DAYS", "AUTHORIZED SIGNATURE"],
+            ["Building Digital Learning Ecosystems", issue_text, signature_cell],
+            ["Transforming Education Through Technology", expiry_text, "CEO, JAVANET ICT SOLUTIONS LTD"]
+        ]
+        if not labels:
+            footer_data = [["", "", ""], ["", issue_text, signature_cell], ["", expiry_text, ""]]
+        footer_table = Table(footer_data, colWidths=[2.5*inch, 2.5*inch, 2.5*inch])
+        footer_table.setStyle(self.footer_table_style)
+        return footer_table
+
+    def _signature_cell(self):
+        if self.signature_image is not None:
+            return copy.copy(self.signature_image)
+        return "_________________________"
+
+    @staticmethod
+    def _dates():
+        current_date = datetime.now()
+        expiry_date = current_date + timedelta(days=30)
+        return (current_date, expiry_date,
+                f"Issue Date: {current_date.strftime('%B %d, %Y')}",
+                f"Expiry: {expiry_date.strftime('%B %d, %Y')}")
+
+    def story(self, data):
+        """Flowables for the whole proposal as a single flow"""
+        current_date, expiry_date, issue_text, expiry_text = self._dates()
+        story = self._copy(self.letterhead)
+        story += self.cover_story(data, current_date, expiry_date)
+        story.append(PageBreak())
+        story += self.section_story(bool(data.get('needs_ctb', False)),
+                                    bool(data.get('needs_live_classes', False)))
+        # 9. Footer with signature
+        story.append(self.footer_table(issue_text, expiry_text, self._signature_cell()))
+        return story
+
+    # ------------------------------------------------------------------
+    # Cached base pages
+    # ------------------------------------------------------------------
+
+    def base_pages(self, needs_ctb, needs_live):
+        """Everything but the personalized text, pre-rendered per module combination
+
+        The letterhead, module and scope sections and the footer artwork
+        (with its dates left blank) are laid out once; markers record where
+        the personalized cover text and footer dates go.
+        """
+        combination = (needs_ctb, needs_live)
+        pages = self._base_pages.get(combination)
+        if pages is None:
+            with self._base_pages_lock:
+                pages = self._base_pages.get(combination)
+                if pages is None:
+                    cover_marker, footer_marker = PositionMarker(), PositionMarker()
+                    story = self._copy(self.letterhead)
+                    story += [cover_marker, PageBreak()]
+                    story += self.section_story(needs_ctb, needs_live)
+                    # Keep the marker on the footer's page
+                    story += [CondPageBreak(self.footer_height), footer_marker,
+                              self.footer_table('', '', self._signature_cell())]
+                    pages = BasePages(
+                        self._build(story), cover_marker.y,
+                        footer_marker.page - 1, footer_marker.x, footer_marker.y, footer_marker.width,
+                    )
+                    self._base_pages[combination] = pages
+        return pages
+
+    def _overlay(self, data, pages):
+        """Personalized text on blank pages matching the base pages, or None if it overflows"""
+        current_date, expiry_date, issue_text, expiry_text = self._dates()
+        buffer = io.BytesIO()
+        canvas = Canvas(buffer, pagesize=PAGE_SIZE)
+
+        # The cover text continues the frame below the letterhead
+        page_width = PAGE_SIZE[0]
+        left, bottom = PAGE_MARGINS['leftMargin'], PAGE_MARGINS['bottomMargin']
+        frame = Frame(left, bottom, page_width - left - PAGE_MARGINS['rightMargin'],
+                      pages.cover_top + 6 - bottom)
+        story = self.cover_story(data, current_date, expiry_date)
+        frame.addFromList(story, canvas)
+        if story:
+            return None
+        canvas.showPage()
+
+        # Same geometry as the base footer, with only the dates drawn
+        table = self.footer_table(issue_text, expiry_text, Spacer(120, 40), labels=False)
+        width, height = table.wrapOn(canvas, pages.footer_width, pages.footer_y)
+        table.drawOn(canvas, pages.footer_x + (pages.footer_width - width) / 2, pages.footer_y - height)
+        canvas.showPage()
+        canvas.save()
+        return buffer.getvalue()
+
+    def render(self, data, use_cache=None, output=None):
+        """Render one proposal to PDF bytes, or into the binary file output
+
+        With pypdf available, only the personalized text is laid out per
+        proposal and stamped onto cached base pages.
+        """
+        if use_cache is None:
+            use_cache = getattr(settings, 'PROPOSAL_PDF_SECTION_CACHE', True)
+        if use_cache and PdfWriter is not None:
+            pages = self.base_pages(bool(data.get('needs_ctb', False)),
+                                    bool(data.get('needs_live_classes', False)))
+            overlay = self._overlay(data, pages)
+            if overlay is not None:
+                writer = PdfWriter()
+                writer.append(PdfReader(io.BytesIO(pages.pdf)))
+                overlay_pages = PdfReader(io.BytesIO(overlay)).pages
+                writer.pages[0].merge_page(overlay_pages[0])
+                writer.pages[pages.footer_page].merge_page(overlay_pages[1])
+                # Merging leaves the stamped page contents uncompressed
+                for page in (writer.pages[0], writer.pages[pages.footer_page]):
+                    page.compress_content_streams()
+                buffer = output if output is not None else io.BytesIO()
+                writer.write(buffer)
+                return None if output is not None else buffer.getvalue()
+            # Cover text longer than one page: lay out the whole document
+
+        return self._build(self.story(data), output)
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_template():
+    """The process-wide ProposalTemplate, built on first use"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = ProposalTemplate()
+                print("✅ Proposal template loaded")
+    return _template
+
+
+def create_pdf_content(data):
+    """Create PDF content elements"""
+    return get_template().story(data)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import ProposalRequest
+from .pricing import pricing_engine
 
 class ProposalRequestSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,11 +10,7 @@ class ProposalRequestSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         # Auto-detect currency based on country
-        country = validated_data.get('country', '').lower()
-        if country in ['nigeria', 'ghana', 'kenya', 'south africa']:
-            validated_data['currency'] = 'NGN'
-        else:
-            validated_data['currency'] = 'USD'
+        validated_data['currency'] = pricing_engine.currency_for(validated_data.get('country', ''))
         
         # Set initial status
         validated_data['status'] = 'PENDING'
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import PricingRegion, PricingRule
+from .pricing import pricing_engine
+
+
+@receiver([post_save, post_delete], sender=PricingRegion)
+@receiver([post_save, post_delete], sender=PricingRule)
+def reload_pricing(sender, **kwargs):
+    """Price changes take effect on the next quote"""
+    pricing_engine.reload()
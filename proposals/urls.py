@@ -9,4 +9,7 @@ urlpatterns = [
     # New endpoints for proposal generation and PDF
     path('generate/', views.GenerateProposalView.as_view(), name='generate-proposal'),
     path('generate-pdf/', views.GenerateProposalPDFView.as_view(), name='generate-pdf'),
+    path('bulk-quote/', views.BulkQuoteView.as_view(), name='bulk-quote'),
+    path('pdf/<str:key>/', views.ProposalPDFDownloadView.as_view(), name='proposal-pdf-download'),
+    path('pdf-jobs/<str:job_id>/', views.ProposalPDFJobView.as_view(), name='proposal-pdf-job'),
 ]
\ No newline at end of file
@@ -1,26 +1,24 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 import json
-import io
-from datetime import datetime, timedelta
-from django.conf import settings
-import os
-from reportlab.platypus import Image
-
-
-# ReportLab imports
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.lib import colors
-from reportlab.lib.units import inch, mm
-from reportlab.platypus.flowables import HRFlowable
+import logging
+import re
+from django.urls import reverse
 
 from .models import ProposalRequest
 from .serializers import ProposalRequestSerializer
+from .pricing import pricing_engine
+from .bulk import BulkQuoteError, parse_rows, quote_rows, iter_csv, as_bool
+from .pdf_cache import pdf_cache, cache_key
+from .downloads import file_response
+from .renderers import render_proposal_pdf
+from .jobs import render_queue, RenderQueueFull
+from .idempotency import idempotent
+from .dedup import DETAIL_FIELDS, proposal_fingerprint, reuse_recent
+
+logger = logging.getLogger(__name__)
 
 class ProposalRequestListView(generics.ListAPIView):
     """List proposal requests (admin only)"""
@@ -35,9 +33,14 @@ class ProposalRequestDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 class GenerateProposalView(APIView):
-    """Generate a new proposal with deployment fee calculation"""
+    """Generate a new proposal with deployment fee calculation
+    
+    Retries carrying the same Idempotency-Key header get the first response,
+    and repeat requests for the same institution reuse the recent proposal.
+    """
     permission_classes = [permissions.AllowAny]
     
+    @idempotent
     def post(self, request):
         try:
             data = request.data
@@ -58,24 +61,9 @@ class GenerateProposalView(APIView):
             estimated_students = data.get('estimated_students', 100)
             
             # Calculate fee
-            if country in ['nigeria', 'ghana', 'kenya', 'south africa']:
-                base = 5000000  # ₦5 million
-                if needs_ctb and needs_live_classes:
-                    base += 2000000
-                if estimated_students > 1000:
-                    base += 2000000
-                elif estimated_students > 500:
-                    base += 1000000
-                amount = f"₦{base:,}"
-                currency = "NGN"
-                currency_symbol = "₦"
-            else:
-                base = 10000  # $10,000
-                if needs_ctb and needs_live_classes:
-                    base += 3000
-                amount = f"${base:,}"
-                currency = "USD"
-                currency_symbol = "$"
+            deployment_fee = pricing_engine.quote(country, needs_ctb, needs_live_classes, estimated_students)
+            amount = deployment_fee['amount']
+            currency = deployment_fee['currency']
             
             # Create proposal data for serializer
             proposal_data = {
@@ -98,20 +86,27 @@ class GenerateProposalView(APIView):
             # Create proposal using serializer
             serializer = ProposalRequestSerializer(data=proposal_data)
             if serializer.is_valid():
-                proposal = serializer.save()
+                validated = serializer.validated_data
+                fingerprint = proposal_fingerprint(
+                    validated['email'], validated['institution'], validated['country'],
+                    needs_ctb, needs_live_classes, estimated_students
+                )
+                # The quote is read-only on the serializer, so it is passed explicitly
+                quote = {'currency': currency, 'deployment_fee': amount}
+                proposal = reuse_recent(fingerprint, dict({
+                    field: validated[field] for field in DETAIL_FIELDS if field in validated
+                }, **quote))
+                reused = proposal is not None
+                if not reused:
+                    proposal = serializer.save(fingerprint=fingerprint, **quote)
                 
                 # Prepare response matching your TypeScript interface
                 response_data = {
                     'status': 'success',
                     'message': 'Proposal generated successfully',
                     'proposal_id': str(proposal.id),  # Convert UUID to string
-                    'deployment_fee': {
-                        'amount': amount,
-                        'currency': currency,
-                        'currency_symbol': currency_symbol,
-                        'range': f'{amount} - {amount}',
-                        'note': 'One-time deployment fee'
-                    },
+                    'reused': reused,
+                    'deployment_fee': deployment_fee,
                     'data': {
                         'id': proposal.id,
                         'name': proposal.name,
@@ -131,7 +126,7 @@ class GenerateProposalView(APIView):
                     }
                 }
                 
-                return Response(response_data, status=status.HTTP_201_CREATED)
+                return Response(response_data, status=status.HTTP_200_OK if reused else status.HTTP_201_CREATED)
             else:
                 return Response({
                     'status': 'error',
@@ -145,25 +140,95 @@ class GenerateProposalView(APIView):
                 'message': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
+class BulkQuoteView(APIView):
+    """Quote deployment fees for a CSV or JSON list of institutions
+    
+    Results stream back as CSV, one line per input row. Pass ?create=true
+    to also store a ProposalRequest for every valid row.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        create = as_bool(request.query_params.get('create'), False)
+        content_type = request.content_type or ''
+        try:
+            if content_type.startswith('multipart/form-data'):
+                upload = request.FILES.get('file')
+                if upload is None:
+                    raise BulkQuoteError("Upload the spreadsheet as 'file'")
+                rows = parse_rows(upload.read(), 'json' if upload.name.endswith('.json') else '')
+            elif 'json' in content_type:
+                rows = parse_rows(request.data, content_type)
+            else:
+                rows = parse_rows(request.body, content_type)
+        except BulkQuoteError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Rows are validated and stored before the response starts, so a
+        # dropped connection never leaves a partial import behind
+        results = quote_rows(rows, create=create, ip_address=request.META.get('REMOTE_ADDR'))
+        response = StreamingHttpResponse(iter_csv(results), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="deployment_quotes.csv"'
+        return response
+
+class ProposalPDFDownloadView(APIView):
+    """Download a previously rendered proposal PDF by its cache key"""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    
+    def get(self, request, key):
+        path = pdf_cache.get(key) if re.fullmatch(r'[0-9a-f]{64}', key) else None
+        if path is None:
+            return Response({
+                'status': 'error',
+                'message': 'PDF not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return file_response(request, path, f"Proposal_{key[:8]}.pdf", key)
+
+class ProposalPDFJobView(APIView):
+    """Status of a background PDF render job"""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    
+    @staticmethod
+    def job_payload(job_id, job):
+        payload = {
+            'job_id': job_id,
+            'status': job['status'],
+            'attempts': job.get('attempts', 0),
+            'error': job.get('error'),
+            'status_url': reverse('proposal-pdf-job', args=[job_id]),
+        }
+        if job['status'] == 'done':
+            payload['download_url'] = reverse('proposal-pdf-download', args=[job_id])
+        return payload
+    
+    def get(self, request, job_id):
+        job = render_queue.status(job_id) if re.fullmatch(r'[0-9a-f]{64}', job_id) else None
+        if job is None:
+            return Response({
+                'status': 'error',
+                'message': 'Render job not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response(self.job_payload(job_id, job))
+
 class GenerateProposalPDFView(APIView):
-    """Generate PDF proposal with company letterhead"""
+    """Generate PDF proposal with company letterhead
+    
+    Renders inline by default; with ?async=true the render is queued and
+    the response is a job to poll via ProposalPDFJobView.
+    """
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
         try:
-            # SIMPLIFIED: Just log basic info
-            print("=" * 60)
-            print("📥 PDF GENERATION REQUEST")
-            print(f"Method: {request.method}")
-            print(f"Path: {request.path}")
-            print("=" * 60)
-            
             data = request.data
             proposal_id = data.get('proposal_id')
-            
-            # Simple debug of data
-            print(f"Has proposal_id: {'proposal_id' in data}")
-            print(f"Keys in data: {list(data.keys())}")
+            logger.debug("PDF generation request %s %s, proposal_id=%s, keys=%s",
+                         request.method, request.path, proposal_id, list(data.keys()))
             
             # Handle deployment fee - SIMPLIFIED
             deployment_fee = 'N/A'
@@ -173,11 +238,11 @@ class GenerateProposalPDFView(APIView):
                 else:
                     deployment_fee = data['deployment_fee']
             
-            print(f"Deployment fee: {deployment_fee}")
+            logger.debug("Deployment fee: %s", deployment_fee)
             
             # Build pdf_data - SIMPLIFIED
             pdf_data = {
-                'proposal_id': proposal_id or f"TEMP_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                'proposal_id': proposal_id,
                 'name': data.get('name', ''),
                 'email': data.get('email', ''),
                 'institution': data.get('institution', ''),
@@ -191,350 +256,49 @@ class GenerateProposalPDFView(APIView):
                 'has_logo': data.get('has_logo', False),
                 'deployment_fee': deployment_fee
             }
+            if not proposal_id:
+                # Derive the temporary id from the content so repeats hit the cache
+                pdf_data['proposal_id'] = f"TEMP_{cache_key(pdf_data)[:10].upper()}"
             
             institution = data.get('institution', 'Unknown')
             
-            print(f"Creating PDF for: {institution}")
-            
-            # Create PDF
-            buffer = io.BytesIO()
-            
-            try:
-                doc = SimpleDocTemplate(
-                    buffer,
-                    pagesize=A4,
-                    rightMargin=20*mm,
-                    leftMargin=20*mm,
-                    topMargin=25*mm,
-                    bottomMargin=20*mm
+            # Async mode: hand the render to the worker pool and return a job id
+            if as_bool(request.query_params.get('async') or data.get('async'), False):
+                try:
+                    job_id = render_queue.submit(pdf_data, proposal_id)
+                except RenderQueueFull:
+                    return Response({
+                        'status': 'error',
+                        'message': 'PDF renderer is busy, please retry shortly'
+                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'})
+                return Response(
+                    ProposalPDFJobView.job_payload(job_id, render_queue.status(job_id)),
+                    status=status.HTTP_202_ACCEPTED
                 )
-                
-                # Build PDF content
-                story = self._create_pdf_content(pdf_data)
-                doc.build(story)
-                
-            except Exception as pdf_error:
-                print(f"❌ PDF creation error: {str(pdf_error)}")
-                raise pdf_error
-            
-            # Get PDF bytes
-            pdf = buffer.getvalue()
-            buffer.close()
-            
-            if len(pdf) < 100:
-                raise ValueError(f"PDF too small ({len(pdf)} bytes)")
             
-            print(f"✅ PDF created: {len(pdf)} bytes")
-            
-            # Create Django HttpResponse
-            response = HttpResponse(
-                pdf,
-                content_type='application/pdf'
-            )
+            # Reuse the rendered file when the data and template are unchanged
+            key, path, rendered = pdf_cache.get_or_render(pdf_data, render_proposal_pdf)
+            if rendered:
+                logger.info("PDF created for: %s", institution)
+            else:
+                logger.info("PDF cache hit for: %s", institution)
+            if proposal_id:
+                pdf_cache.attach(proposal_id, key)
             
             # Generate filename
             institution_safe = institution.replace(' ', '_')
             proposal_id_str = str(proposal_id) if proposal_id else 'temp'
             filename = f"Proposal_{proposal_id_str}_{institution_safe}.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
             
+            response = file_response(request, path, filename, key)
+            response['Content-Location'] = reverse('proposal-pdf-download', args=[key])
             return response
             
         except Exception as e:
-            print(f"❌ ERROR: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("PDF generation failed")
             
             # Return simple JSON error
             return Response({
                 'status': 'error',
                 'message': f'Error generating PDF: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-    
-    def _create_pdf_content(self, data):
-        """Create PDF content elements - SINGLE VERSION (remove duplicates)"""
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'TitleStyle',
-            parent=styles['Heading1'],
-            fontSize=22,
-            textColor=colors.HexColor('#0d6efd'),
-            alignment=TA_CENTER,
-            spaceAfter=15,
-            fontName='Helvetica-Bold'
-        )
-        
-        company_style = ParagraphStyle(
-            'CompanyStyle',
-            parent=styles['Normal'],
-            fontSize=12,
-            textColor=colors.HexColor('#666666'),
-            alignment=TA_CENTER,
-            spaceAfter=5
-        )
-        
-        heading_style = ParagraphStyle(
-            'HeadingStyle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#333333'),
-            spaceAfter=8,
-            fontName='Helvetica-Bold'
-        )
-        
-        normal_style = ParagraphStyle(
-            'NormalStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#333333'),
-            spaceAfter=5,
-            fontName='Helvetica'
-        )
-        
-        # ===========================================
-        # 1. LETTERHEAD WITH 350x350 LOGO
-        # ===========================================
-        try:
-            from reportlab.platypus import Image
-            
-            # YOUR ACTUAL LOGO PATH
-            logo_path = "static/images/logo/paperlogo.png"
-            
-            try:
-                # Load the 350x350 logo
-                logo_image = Image(logo_path, width=180, height=150)
-                print(f"✅ Logo loaded successfully from: {logo_path}")
-                
-                # Center the logo
-                logo_image.hAlign = 'CENTER'
-                story.append(logo_image)
-                story.append(Spacer(1, 2))  # Small space after logo
-                
-                
-            except Exception as img_error:
-                # If logo file not found or can't be read
-                print(f"⚠️ Could not load logo from {logo_path}: {img_error}")
-                print("Using text fallback...")
-                story.append(Paragraph("JAVANET ICT SOLUTIONS", title_style))
-                
-        except ImportError:
-            # If Image import fails
-            print("⚠️ ReportLab Image import failed. Using text fallback.")
-            story.append(Paragraph("PROFESSIONAL E-LEARNING PLATFORM DEPLOYMENT", title_style))
-        
-        # Company tagline
-        story.append(Paragraph("", 
-                            ParagraphStyle('SubTitle', parent=styles['Normal'], 
-                                        fontSize=12, alignment=TA_CENTER,
-                                        textColor=colors.HexColor('#666666'))))
-        
-        # Company contact info
-        company_info = [
-            "House 26, T.O.S Benson Crescent, Utako, Abuja, Nigeria",
-            "Phone: +234 703 067 3089 | Email: info@javanetict.com",
-            "Website: www.javanetict.com"
-        ]
-        
-        for line in company_info:
-            story.append(Paragraph(line, company_style))
-        
-        story.append(Spacer(1, 10))
-        
-        # Horizontal line
-        story.append(HRFlowable(width="100%", thickness=1, 
-                            color=colors.HexColor('#0d6efd'),
-                            spaceBefore=5, spaceAfter=15))
-        
-        # ===========================================
-        # 2. PROPOSAL HEADER
-        # ===========================================
-        current_date = datetime.now()
-        expiry_date = current_date + timedelta(days=30)
-        proposal_id = data.get('proposal_id', 'temp')
-        
-        header_data = [
-            ["PROPOSAL ID", f"#{proposal_id}"],
-            ["DATE", current_date.strftime("%B %d, %Y")],
-            ["VALID UNTIL", expiry_date.strftime("%B %d, %Y")]
-        ]
-        
-        header_table = Table(header_data, colWidths=[2*inch, 3*inch])
-        header_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#0d6efd')),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        
-        story.append(header_table)
-        story.append(Spacer(1, 25))
-        
-        # ===========================================
-        # 3. RECIPIENT INFO
-        # ===========================================
-        story.append(Paragraph("TO:", heading_style))
-        recipient_info = f"""
-        <b>{data.get('name', '')}</b><br/>
-        {data.get('institution', '')}<br/>
-        {data.get('country', '')}<br/>
-        Email: {data.get('email', '')}<br/>
-        Phone: {data.get('phone', 'Not provided')}
-        """
-        story.append(Paragraph(recipient_info, normal_style))
-        story.append(Spacer(1, 25))
-        
-        # ===========================================
-        # 4. MAIN TITLE
-        # ===========================================
-        story.append(Paragraph("CUSTOM E-LEARNING PLATFORM DEPLOYMENT PROPOSAL", 
-                            ParagraphStyle('MainTitle', parent=styles['Heading1'],
-                                        fontSize=16, alignment=TA_CENTER,
-                                        textColor=colors.HexColor('#0d6efd'),
-                                        spaceAfter=15, fontName='Helvetica-Bold')))
-        
-        story.append(HRFlowable(width="60%", thickness=2, 
-                            color=colors.HexColor('#0d6efd'),
-                            spaceBefore=5, spaceAfter=20))
-        
-        # ===========================================
-        # 5. EXECUTIVE SUMMARY
-        # ===========================================
-        story.append(Paragraph("1. EXECUTIVE SUMMARY", heading_style))
-        
-        summary_text = f"""
-        This formal proposal outlines the comprehensive one-time deployment package for a 
-        customized e-learning platform tailored specifically for <b>{data.get('institution', '')}</b> 
-        located in <b>{data.get('country', '')}</b>. The proposed solution is designed to 
-        support approximately <b>{data.get('estimated_students', 0)}</b> students and 
-        <b>{data.get('estimated_teachers', 0)}</b> teachers.
-        """
-        
-        story.append(Paragraph(summary_text, normal_style))
-        story.append(Spacer(1, 25))
-        
-        # ===========================================
-        # 6. DEPLOYMENT FEE
-        # ===========================================
-        story.append(Paragraph("2. ONE-TIME DEPLOYMENT FEE", heading_style))
-        
-        fee_amount = data.get('deployment_fee', 'N/A')
-        fee_paragraph = Paragraph(f"""
-        <para alignment="center">
-        <font size="20" color="#198754"><b>{fee_amount}</b></font><br/>
-        <font size="9" color="#666666">No Monthly Fees • Complete Ownership • Source Code Included</font>
-        </para>
-        """, normal_style)
-        
-        story.append(fee_paragraph)
-        story.append(Spacer(1, 25))
-        
-        # ===========================================
-        # 7. MODULES INCLUDED
-        # ===========================================
-        story.append(Paragraph("3. PLATFORM MODULES INCLUDED", heading_style))
-        
-        needs_ctb = data.get('needs_ctb', False)
-        needs_live = data.get('needs_live_classes', False)
-        
-        if needs_ctb:
-            story.append(Paragraph("✓ Computer-Based Testing (CBT) System", 
-                                ParagraphStyle('ModuleTitle', parent=styles['Normal'],
-                                            fontSize=11, textColor=colors.HexColor('#0d6efd'),
-                                            leftIndent=15, fontName='Helvetica-Bold')))
-            cbt_features = [
-                "• Advanced question bank management system",
-                "• Automated grading and analytics dashboard",
-                "• Secure, Role-Based Authentication",
-                "• Multi-format question support"
-            ]
-            for feature in cbt_features:
-                story.append(Paragraph(feature, 
-                                    ParagraphStyle('Feature', parent=styles['Normal'],
-                                                fontSize=9, leftIndent=30)))
-            story.append(Spacer(1, 12))
-        
-        if needs_live:
-            story.append(Paragraph("✓ Live Interactive Classroom", 
-                                ParagraphStyle('ModuleTitle', parent=styles['Normal'],
-                                            fontSize=11, textColor=colors.HexColor('#198754'),
-                                            leftIndent=15, fontName='Helvetica-Bold')))
-            live_features = [
-                "• HD video conferencing with virtual whiteboard",
-                "• Intelligent Matching Engine",
-                "• Smart Attendance & Payroll",
-                "• Teacher Recruitment Suite"
-            ]
-            for feature in live_features:
-                story.append(Paragraph(feature, 
-                                    ParagraphStyle('Feature', parent=styles['Normal'],
-                                                fontSize=9, leftIndent=30)))
-            story.append(Spacer(1, 25))
-        
-        # ===========================================
-        # 8. SCOPE OF WORK
-        # ===========================================
-        story.append(Paragraph("4. SCOPE OF DEPLOYMENT", heading_style))
-        
-        scope_items = [
-            "• Custom platform branding with institution's colors and logo",
-            "• Complete source code transfer and ownership rights",
-            "• Full installation and configuration on your servers",
-            "• Administrator and teacher training sessions",
-            "• One year of comprehensive technical support",
-            "• Lifetime system updates and security patches"
-        ]
-        
-        for item in scope_items:
-            story.append(Paragraph(item, normal_style))
-        
-        story.append(Spacer(1, 35))
-        
-        # ===========================================
-        # 9. FOOTER WITH SIGNATURE
-        # ===========================================
-        
-        # Get the path to your signature image
-        signature_path = os.path.join(settings.BASE_DIR, 'static/images/signature.png')
-        
-        # Check if signature file exists and create appropriate cell
-        signature_cell = None
-        if os.path.exists(signature_path):
-            try:
-                signature_cell = Image(signature_path, width=120, height=40)
-                print(f"✅ Signature loaded successfully from: {signature_path}")
-            except Exception as sig_error:
-                print(f"⚠️ Could not load signature from {signature_path}: {sig_error}")
-                signature_cell = "_________________________"
-        else:
-            print(f"⚠️ Signature file not found at: {signature_path}")
-            signature_cell = "_________________________"
-        
-        footer_data = [
-            ["JAVANET ICT SOLUTIONS", "PROPOSAL VALID FOR 30 DAYS", "AUTHORIZED SIGNATURE"],
-            ["Building Digital Learning Ecosystems", 
-            f"Issue Date: {current_date.strftime('%B %d, %Y')}", 
-            signature_cell],  # Use signature image here
-            ["Transforming Education Through Technology", 
-            f"Expiry: {expiry_date.strftime('%B %d, %Y')}", 
-            "CEO, JAVANET ICT SOLUTIONS LTD"]
-        ]
-        
-        footer_table = Table(footer_data, colWidths=[2.5*inch, 2.5*inch, 2.5*inch])
-        footer_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#666666')),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        
-        story.append(footer_table)
-        
-        return story
\ No newline at end of file